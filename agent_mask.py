@@ -0,0 +1,47 @@
+from typing import Iterable, List
+
+from aiwolf import Agent
+from aiwolf.constant import AGENT_NONE
+
+
+def bit(agent: Agent) -> int:
+    """Return the bitmask containing only the given agent."""
+    return 1 << agent.agent_idx
+
+
+def mask_of(agent_list: Iterable[Agent]) -> int:
+    """Return the bitmask of the given agents."""
+    mask: int = 0
+    for a in agent_list:
+        mask |= 1 << a.agent_idx
+    return mask
+
+
+def count(mask: int) -> int:
+    """Return the number of agents in the bitmask."""
+    return bin(mask).count("1")
+
+
+class AgentIndex:
+    """Agents of a game addressed by their agent index,
+    so that sets of agents can be held as bitmasks."""
+    __slots__ = ("agents", "all")
+    agents: List[Agent] # Agents indexed by agent index.
+    all: int # Bitmask of all agents.
+
+    def __init__(self, agent_list: Iterable[Agent] = ()) -> None:
+        agent_list = list(agent_list)
+        size: int = max((a.agent_idx for a in agent_list), default=0) + 1
+        self.agents = [AGENT_NONE] * size
+        for a in agent_list:
+            self.agents[a.agent_idx] = a
+        self.all = mask_of(agent_list)
+
+    def select(self, mask: int) -> List[Agent]:
+        """Return the agents in the bitmask in order of agent index."""
+        agents: List[Agent] = []
+        while mask:
+            low: int = mask & -mask
+            agents.append(self.agents[low.bit_length() - 1])
+            mask ^= low
+        return agents
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from aiwolf import GameSetting
+
+# Time limit of a request in milliseconds when the game setting has none.
+DEFAULT_TIME_LIMIT: int = 1000
+# Fraction of the time limit available for decisions. The rest is left for communication.
+DEADLINE_RATIO: float = 0.5
+# Background threads shared by all agents of the process.
+WORKER_THREADS: int = min(4, os.cpu_count() or 1)
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """Point in time by which the answer to a request has to be ready."""
+    __slots__ = ("end", "cancelled")
+    end: float # Monotonic time of the deadline.
+    cancelled: bool # Whether the work for this deadline is no longer needed.
+
+    def __init__(self, seconds: float) -> None:
+        self.end = time.monotonic() + seconds
+        self.cancelled = False
+
+    @staticmethod
+    def from_setting(game_setting: Optional[GameSetting]) -> "Deadline":
+        """Return the deadline of a request arriving now under the time limit of the game setting."""
+        time_limit: int = getattr(game_setting, "time_limit", 0) or 0
+        if time_limit <= 0:
+            time_limit = DEFAULT_TIME_LIMIT
+        return Deadline(time_limit * DEADLINE_RATIO / 1000)
+
+    def remaining(self) -> float:
+        """Return the seconds left until the deadline."""
+        return 0.0 if self.cancelled else max(self.end - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        """Bool value of whether no time is left."""
+        return self.cancelled or time.monotonic() >= self.end
+
+    def cancel(self) -> None:
+        """Make the deadline expire now."""
+        self.cancelled = True
+
+
+# Context of the thread starting computations: its wrap attribute, if set, wraps every computation started,
+# as the profiler does to follow the callback it profiles onto the background threads.
+task_context: threading.local = threading.local()
+# Executor of the background computations of all agents of the process, created on first use.
+shared_executor: Optional[ThreadPoolExecutor] = None
+shared_executor_lock: threading.Lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the executor shared by all agents of the process, creating it the first time."""
+    global shared_executor
+    with shared_executor_lock:
+        if shared_executor is None:
+            shared_executor = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="anytime")
+        return shared_executor
+
+
+class AnytimeWorker:
+    """Runs speculative computations on the background threads of the process, the latest one for each key.
+    A computation receives its own deadline, which expires when it is superseded."""
+    tasks: Dict[str, Tuple[Future, Deadline]] # Latest computation of each key and its deadline.
+
+    def __init__(self) -> None:
+        self.tasks = {}
+
+    def start(self, key: str, func: Callable[..., Any], deadline: Deadline, *args: Any) -> None:
+        """Begin computing func(budget, *args) in the background, superseding the previous computation of the key."""
+        previous: Optional[Tuple[Future, Deadline]] = self.tasks.get(key)
+        if previous is not None:
+            previous[0].cancel()
+            previous[1].cancel()
+        budget: Deadline = Deadline(deadline.remaining())
+        wrap: Optional[Callable[[Callable[..., Any]], Callable[..., Any]]] = getattr(task_context, "wrap", None)
+        if wrap is not None:
+            func = wrap(func)
+        self.tasks[key] = (get_executor().submit(func, budget, *args), budget)
+
+    def result(self, key: str, deadline: Deadline, fallback: Callable[[], T]) -> T:
+        """Return the result of the latest computation of the key, waiting for it until the deadline.
+        Return the fallback if it is not ready in time or has failed."""
+        task: Optional[Tuple[Future, Deadline]] = self.tasks.get(key)
+        if task is None:
+            return fallback()
+        try:
+            return task[0].result(timeout=deadline.remaining())
+        except Exception:  # Not ready in time, cancelled or failed.
+            return fallback()
+
+    def take(self, key: str, deadline: Optional[Deadline], fallback: Callable[[], T]) -> T:
+        """Return the result of the latest computation of the key like result, but only once:
+        the computation is forgotten when its result is returned or when it has failed.
+        Without a deadline, the result is waited for however long it takes."""
+        task: Optional[Tuple[Future, Deadline]] = self.tasks.get(key)
+        if task is None:
+            return fallback()
+        try:
+            value: T = task[0].result(timeout=deadline.remaining() if deadline is not None else None)
+        except TimeoutError:  # Still running, so it is kept for a later request.
+            return fallback()
+        except Exception:  # Cancelled or failed.
+            del self.tasks[key]
+            return fallback()
+        del self.tasks[key]
+        return value
+
+    def close(self) -> None:
+        """Stop all computations of the agent. The threads are kept for the next game."""
+        for future, budget in self.tasks.values():
+            future.cancel()
+            budget.cancel()
+        self.tasks.clear()
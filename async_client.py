@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from aiwolf import AbstractPlayer
+
+from engine import LocalSeat, Packet
+
+try:  # orjson decodes the large game information packets several times faster.
+    import orjson
+    loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:
+    loads = json.loads
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Name answered when none is given.
+DEFAULT_NAME: str = "hyunji"
+# Largest line of the protocol. Game information packets of big villages run to hundreds of kilobytes.
+STREAM_LIMIT: int = 16 * 1024 * 1024
+# Requests answered with an agent index.
+AGENT_REQUESTS: frozenset = frozenset({"VOTE", "DIVINE", "GUARD", "ATTACK"})
+# Requests answered with text.
+TEXT_REQUESTS: frozenset = frozenset({"TALK", "WHISPER"})
+
+
+class AsyncClient:
+    """Connects a player to the AIWolf server on an asyncio event loop.
+    NAME and ROLE are answered on the loop at once. The other requests are handed in order
+    to the executor, and the next request is read while a notification is still being handled.
+    A failed notification is logged and the game goes on; a failed request ends the connection of this client only."""
+    player: AbstractPlayer # Player answering the requests.
+    name: Optional[str] # Name of the agent.
+    role: str # Requested role.
+    executor: Executor # Executor running the callbacks of the player.
+    seat: LocalSeat # Turns the packets into the callbacks of the player.
+    pending: Optional[asyncio.Future] # Latest callback handed to the executor.
+
+    def __init__(self, player: AbstractPlayer, name: Optional[str], role: str, executor: Executor) -> None:
+        self.player = player
+        self.name = name
+        self.role = role
+        self.executor = executor
+        self.seat = LocalSeat(player)
+        self.pending = None
+
+    def handle(self, packet: Packet) -> Any:
+        """Deliver the packet to the player and return its response."""
+        if packet["request"] == "INITIALIZE":
+            self.seat.compiled = {}  # Talks of the previous game are no longer needed.
+        return self.seat.request(packet)
+
+    def submit(self, packet: Packet) -> asyncio.Future:
+        """Hand the packet to the executor once the callbacks handed before are over, and return its future."""
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        previous: Optional[asyncio.Future] = self.pending
+
+        async def chained() -> Any:
+            if previous is not None:
+                try:
+                    await previous
+                except Exception:  # Logged where it is awaited or by notification_done.
+                    pass
+            return await loop.run_in_executor(self.executor, self.handle, packet)
+
+        self.pending = asyncio.ensure_future(chained())
+        return self.pending
+
+    def notification_done(self, future: asyncio.Future) -> None:
+        """Log the failure of a notification, which nobody awaits."""
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("%s failed to handle a notification", self.name or DEFAULT_NAME,
+                         exc_info=future.exception())
+
+    @staticmethod
+    def response(request: str, value: Any) -> bytes:
+        """Return the line answering the request with the value returned by the player."""
+        if request in AGENT_REQUESTS:
+            return json.dumps({"agentIdx": value}, separators=(",", ":")).encode() + b"\n"
+        return f"{value}\n".encode()
+
+    async def run(self, hostname: str, port: int) -> None:
+        """Play games while the connection lasts."""
+        reader, writer = await asyncio.open_connection(hostname, port, limit=STREAM_LIMIT)
+        try:
+            while True:
+                line: bytes = await reader.readline()
+                if not line:
+                    break
+                packet: Packet = loads(line)
+                request: str = packet["request"]
+                if request == "NAME":
+                    writer.write(f"{self.name or DEFAULT_NAME}\n".encode())
+                elif request == "ROLE":
+                    writer.write(f"{self.role}\n".encode())
+                else:
+                    future: asyncio.Future = self.submit(packet)
+                    if request not in TEXT_REQUESTS and request not in AGENT_REQUESTS:
+                        future.add_done_callback(self.notification_done)
+                        continue  # A notification, handled while the next request is read.
+                    writer.write(self.response(request, await future))
+                await writer.drain()
+            if self.pending is not None:
+                try:
+                    await self.pending
+                except Exception:  # A notification, logged by notification_done.
+                    pass
+        finally:
+            writer.close()
+
+
+async def host_async(players: List[AbstractPlayer], names: List[Optional[str]], roles: List[str],
+                     hostname: str, port: int, workers: Optional[int] = None) -> None:
+    """Connect the players on one event loop and wait until all of their connections are closed.
+    A client failing does not close the connections of the others; its failure is logged."""
+    with ThreadPoolExecutor(workers) as executor:
+        clients: List[AsyncClient] = [AsyncClient(p, n, r, executor) for p, n, r in zip(players, names, roles)]
+        results: List[Any] = await asyncio.gather(*(c.run(hostname, port) for c in clients), return_exceptions=True)
+        for client, result in zip(clients, results):
+            if isinstance(result, BaseException):
+                logger.error("%s disconnected after a failure", client.name or DEFAULT_NAME, exc_info=result)
@@ -0,0 +1,297 @@
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from aiwolf import Role
+
+from anytime import Deadline
+
+# Role assignments are enumerated exhaustively up to this number, and sampled above it.
+MAX_ASSIGNMENTS: int = 20000
+# Number of assignments kept when sampling.
+SAMPLE_SIZE: int = 2000
+# Largest number of additional batches of samples drawn while refining in the background.
+MAX_REFINE_BATCHES: int = 16
+# Largest number of samples kept, the ones merged back from refinements included.
+MAX_SAMPLES: int = 8 * SAMPLE_SIZE
+
+# Number of batches every refinement draws however long they take, or None to draw them while time remains.
+# With a fixed number, which the agents wait for, sampled beliefs and so whole games replay from their seeds.
+refine_batches: Optional[int] = None
+
+# A constraint returns which assignments, given as the bitmasks of werewolves and possessed, are kept.
+Constraint = Callable[[np.ndarray, np.ndarray], np.ndarray]
+# Samples drawn by a refinement: generation, number of constraints they satisfy, werewolves and possessed.
+Refined = Tuple[int, int, np.ndarray, np.ndarray]
+
+
+def has_bit(masks: np.ndarray, idx: int) -> np.ndarray:
+    """Return whether each of the packed bitmasks contains the agent index."""
+    return (masks[:, idx >> 3] >> (idx & 7)) & 1 == 1
+
+
+def binary_entropy(p: np.ndarray) -> np.ndarray:
+    """Return the entropy in bits of events having the given probabilities."""
+    q: np.ndarray = 1.0 - p
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy: np.ndarray = -(p * np.log2(p) + q * np.log2(q))
+    return np.nan_to_num(entropy)
+
+
+def use_fixed_refinement(batches: Optional[int] = MAX_REFINE_BATCHES) -> None:
+    """Make every refinement draw the given number of batches, or while time remains if it is None."""
+    global refine_batches
+    refine_batches = batches
+
+
+@lru_cache(maxsize=64)
+def assignment_positions(n: int, wolves: int, possessed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return all ways to choose the positions of werewolves and possessed among n agents,
+    one row per assignment. They only depend on the numbers, so they are shared across games."""
+    wolf_rows: List[Tuple[int, ...]] = []
+    possessed_rows: List[Tuple[int, ...]] = []
+    for w in combinations(range(n), wolves):
+        rest: List[int] = [i for i in range(n) if i not in w]
+        for p in combinations(rest, possessed):
+            wolf_rows.append(w)
+            possessed_rows.append(p)
+    return (np.array(wolf_rows, dtype=np.int64).reshape(len(wolf_rows), wolves),
+            np.array(possessed_rows, dtype=np.int64).reshape(len(possessed_rows), possessed))
+
+
+class RoleBelief:
+    """Role assignments consistent with what is known in the game.
+    Each assignment is held as the bitmasks of werewolves and of possessed,
+    packed into rows of bytes, and is pruned as new claims and results arrive."""
+    size: int # Number of agent indices, including the unused index 0.
+    wolves: np.ndarray # Packed bitmasks of werewolves, one row per assignment.
+    possessed: np.ndarray # Packed bitmasks of possessed, one row per assignment.
+    sampled: bool # Whether the assignments are sampled instead of enumerated.
+    unknown: np.ndarray # Agent indices whose roles are not known.
+    num_wolves: int # Number of werewolves to be placed among unknown agents.
+    num_possessed: int # Number of possessed to be placed among unknown agents.
+    fixed_wolves: np.ndarray # Row of the werewolves known from the start.
+    capacity: Dict[Role, int] # Number of honest agents that can claim each role.
+    claimants: Dict[Role, List[int]] # Agents claiming each role.
+    constraints: List[Constraint] # Constraints applied so far, reapplied to new samples.
+    wolf_counts: Optional[np.ndarray] # Number of assignments in which each agent is a werewolf.
+    probabilities: Optional[np.ndarray] # Cached probability of each agent being a werewolf.
+    rng: np.random.Generator # Random number generator for sampling.
+    version: int # Incremented whenever constraints or a new game change the assignments.
+    generation: int # Incremented at every new game, so that refinements of a past game are dropped.
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.size = 0
+        self.wolves = np.zeros((0, 0), dtype=np.uint8)
+        self.possessed = np.zeros((0, 0), dtype=np.uint8)
+        self.sampled = False
+        self.unknown = np.zeros(0, dtype=np.int64)
+        self.num_wolves = 0
+        self.num_possessed = 0
+        self.fixed_wolves = np.zeros(0, dtype=np.uint8)
+        self.capacity = {}
+        self.claimants = {}
+        self.constraints = []
+        self.wolf_counts = None
+        self.probabilities = None
+        self.rng = np.random.default_rng(seed)
+        self.version = 0
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return self.wolves.shape[0]
+
+    def reseed(self, seed: Optional[int]) -> None:
+        """Restart the random number generator from the seed."""
+        self.rng = np.random.default_rng(seed)
+
+    def reset(self, size: int, me: int, my_role: Role, role_num_map: Dict[Role, int],
+              known_wolves: List[int]) -> None:
+        """Start a new game with agent indices below the given size."""
+        self.size = size
+        self.capacity = {r: n - (1 if r == my_role else 0) for r, n in role_num_map.items()}
+        self.capacity[Role.WEREWOLF] = 0
+        self.capacity[Role.POSSESSED] = 0
+        self.claimants = {}
+        self.constraints = []
+        self.wolf_counts = None
+        self.probabilities = None
+        fixed: np.ndarray = np.zeros(size, dtype=bool)
+        fixed[known_wolves] = True
+        self.fixed_wolves = np.packbits(fixed, bitorder="little")
+        known: np.ndarray = fixed.copy()
+        known[[0, me]] = True
+        self.unknown = np.flatnonzero(~known).astype(np.int64)
+        self.num_wolves = role_num_map.get(Role.WEREWOLF, 0) - len(known_wolves)
+        self.num_possessed = role_num_map.get(Role.POSSESSED, 0) - (1 if my_role == Role.POSSESSED else 0)
+        n: int = len(self.unknown)
+        total: int = comb(n, self.num_wolves) * comb(n - self.num_wolves, self.num_possessed)
+        self.sampled = total > MAX_ASSIGNMENTS
+        self.wolves, self.possessed = self.sample(SAMPLE_SIZE) if self.sampled else self.enumerate()
+        self.version += 1
+        self.generation += 1
+
+    def pack(self, wolf_indices: np.ndarray, possessed_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return packed bitmasks of the assignments given as index arrays, one row per assignment."""
+        rows: np.ndarray = np.arange(wolf_indices.shape[0])[:, None]
+        wolves: np.ndarray = np.zeros((wolf_indices.shape[0], self.size), dtype=bool)
+        possessed: np.ndarray = np.zeros_like(wolves)
+        wolves[rows, wolf_indices] = True
+        possessed[rows, possessed_indices] = True
+        return (np.packbits(wolves, axis=1, bitorder="little") | self.fixed_wolves,
+                np.packbits(possessed, axis=1, bitorder="little"))
+
+    def enumerate(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return all assignments of werewolves and possessed to the unknown agents."""
+        wolf_positions, possessed_positions = assignment_positions(len(self.unknown), self.num_wolves,
+                                                                   self.num_possessed)
+        return self.pack(self.unknown[wolf_positions], self.unknown[possessed_positions])
+
+    def sample(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return randomly drawn assignments of werewolves and possessed to the unknown agents."""
+        drawn: np.ndarray = self.rng.permuted(np.tile(self.unknown, (count, 1)), axis=1)
+        return self.pack(drawn[:, :self.num_wolves], drawn[:, self.num_wolves:self.num_wolves + self.num_possessed])
+
+    def refill(self) -> None:
+        """Draw new samples consistent with all constraints when too few are left."""
+        for _ in range(4):
+            if len(self) >= SAMPLE_SIZE // 2:
+                return
+            wolves, possessed = self.sample(SAMPLE_SIZE)
+            for constraint in self.constraints:
+                keep: np.ndarray = constraint(wolves, possessed)
+                wolves, possessed = wolves[keep], possessed[keep]
+            self.wolves = np.concatenate((self.wolves, wolves))[:SAMPLE_SIZE]
+            self.possessed = np.concatenate((self.possessed, possessed))[:SAMPLE_SIZE]
+            self.wolf_counts = None
+
+    def apply(self, constraint: Constraint) -> None:
+        """Keep only the assignments satisfying the constraint.
+        A constraint no assignment satisfies contradicts what is known, and is ignored."""
+        keep: np.ndarray = constraint(self.wolves, self.possessed)
+        if not keep.any():
+            return
+        if keep.all():
+            if self.sampled:  # New samples still have to satisfy it.
+                self.constraints.append(constraint)
+            return
+        if self.wolf_counts is not None:
+            # Usually few assignments are removed at a time, so subtract them rather than count the rest.
+            removed: np.ndarray = ~keep
+            if np.count_nonzero(removed) * 2 < len(keep):
+                self.wolf_counts = self.wolf_counts - self.count_wolves(self.wolves[removed])
+            else:
+                self.wolf_counts = None
+        self.wolves = self.wolves[keep]
+        self.possessed = self.possessed[keep]
+        self.constraints.append(constraint)
+        self.probabilities = None
+        self.version += 1
+        if self.sampled:
+            self.refill()
+
+    def add_fact(self, target: int, werewolf: bool) -> None:
+        """The target is known to be a werewolf or a human."""
+        self.apply(lambda w, p: has_bit(w, target) == werewolf)
+
+    def add_judge(self, speaker: int, target: int, werewolf: bool) -> None:
+        """The speaker reported the target as a werewolf or a human. Only werewolves and possessed lie."""
+        self.apply(lambda w, p: has_bit(w, speaker) | has_bit(p, speaker) | (has_bit(w, target) == werewolf))
+
+    def add_claim(self, speaker: int, role: Role) -> None:
+        """The speaker claimed the role. Honest claimants cannot outnumber the role."""
+        claimants: List[int] = self.claimants.setdefault(role, [])
+        if speaker in claimants:
+            return
+        claimants.append(speaker)
+        capacity: int = self.capacity.get(role, 0)
+        if len(claimants) <= capacity:
+            return
+        agents: List[int] = list(claimants)
+
+        def constraint(w: np.ndarray, p: np.ndarray) -> np.ndarray:
+            honest: np.ndarray = np.zeros(w.shape[0], dtype=np.int64)
+            for a in agents:
+                honest += ~(has_bit(w, a) | has_bit(p, a))
+            return honest <= capacity
+        self.apply(constraint)
+
+    def add_alive(self, alive: int) -> None:
+        """The game goes on, so at least one werewolf is alive."""
+        mask: np.ndarray = np.frombuffer(alive.to_bytes((self.size + 7) // 8, "little"), dtype=np.uint8)
+        self.apply(lambda w, p: (w & mask).any(axis=1))
+
+    def count_wolves(self, wolves: np.ndarray) -> np.ndarray:
+        """Return the number of the given assignments in which each agent is a werewolf."""
+        return np.unpackbits(wolves, axis=1, count=self.size, bitorder="little").sum(axis=0, dtype=np.int64)
+
+    def werewolf_probabilities(self) -> np.ndarray:
+        """Return the probability of each agent being a werewolf, indexed by agent index."""
+        if self.probabilities is None:
+            if len(self) == 0:
+                self.probabilities = np.zeros(self.size)
+            else:
+                if self.wolf_counts is None:
+                    self.wolf_counts = self.count_wolves(self.wolves)
+                self.probabilities = self.wolf_counts / len(self)
+        return self.probabilities
+
+    def information_gains(self) -> np.ndarray:
+        """Return the expected information in bits about the werewolves gained by divining each agent.
+        A divination reveals exactly whether the agent is a werewolf,
+        so the gain is the binary entropy of the agent being a werewolf."""
+        return binary_entropy(self.werewolf_probabilities())
+
+    def snapshot(self) -> "RoleBelief":
+        """Return a copy that can be refined on another thread while this one keeps being pruned.
+        Assignments are replaced rather than modified in place, so they are shared."""
+        copy: RoleBelief = RoleBelief.__new__(RoleBelief)
+        copy.__dict__.update(self.__dict__)
+        copy.constraints = list(self.constraints)
+        copy.rng = np.random.default_rng(self.rng.integers(1 << 63))
+        return copy
+
+    def refine(self, deadline: Deadline) -> Refined:
+        """Draw samples consistent with all constraints while time remains, or the fixed number of batches
+        if refinements are fixed, to be merged back by merge. Either stops early once the deadline is cancelled.
+        Meant to run on a snapshot, so that the belief itself keeps being pruned meanwhile."""
+        drawn_wolves: List[np.ndarray] = []
+        drawn_possessed: List[np.ndarray] = []
+        room: int = MAX_SAMPLES - len(self)
+        fixed: Optional[int] = refine_batches
+        for _ in range(fixed if fixed is not None else MAX_REFINE_BATCHES):
+            if room <= 0 or (deadline.cancelled if fixed is not None else deadline.expired()):
+                break
+            wolves, possessed = self.sample(SAMPLE_SIZE)
+            for constraint in self.constraints:
+                keep: np.ndarray = constraint(wolves, possessed)
+                wolves, possessed = wolves[keep], possessed[keep]
+            drawn_wolves.append(wolves[:room])
+            drawn_possessed.append(possessed[:room])
+            room -= wolves.shape[0]
+        if not drawn_wolves:
+            empty: np.ndarray = self.wolves[:0]
+            return self.generation, len(self.constraints), empty, empty
+        return (self.generation, len(self.constraints),
+                np.concatenate(drawn_wolves), np.concatenate(drawn_possessed))
+
+    def merge(self, refined: Refined) -> None:
+        """Add the samples drawn by a refinement, dropping the ones the constraints applied since rule out.
+        The werewolf counts are brought up to date with the new samples alone."""
+        generation, applied, wolves, possessed = refined
+        if generation != self.generation or not self.sampled:
+            return
+        for constraint in self.constraints[applied:]:
+            keep: np.ndarray = constraint(wolves, possessed)
+            wolves, possessed = wolves[keep], possessed[keep]
+        room: int = MAX_SAMPLES - len(self)
+        wolves, possessed = wolves[:room], possessed[:room]
+        if wolves.shape[0] == 0:
+            return
+        if self.wolf_counts is not None:
+            self.wolf_counts = self.wolf_counts + self.count_wolves(wolves)
+        self.wolves = np.concatenate((self.wolves, wolves))
+        self.possessed = np.concatenate((self.possessed, possessed))
+        self.probabilities = None
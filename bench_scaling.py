@@ -0,0 +1,272 @@
+import gc
+import math
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from aiwolf import AbstractPlayer, Agent, Content, GameInfo, GameSetting
+
+import opponent_store
+import talk_log
+from engine import GameEngine, LocalSeat, Packet
+from hyunji_agent import HyunjiPlayer, preload
+
+T = TypeVar("T")
+
+# Callback of a role: (role, callback).
+Key = Tuple[str, str]
+
+# Largest growth exponent of the cost of a callback in the number of agents.
+# Talks per day grow linearly with the village, so every callback is expected to be linear at worst,
+# and quadratic patterns show up near 2.
+MAX_EXPONENT: float = 1.4
+# Largest growth exponents of the callbacks expected to grow faster.
+# A werewolf enumerates one assignment per agent that may be the possessed, each a row of bits of all agents,
+# until there are more than MAX_ASSIGNMENTS of them.
+EXPECTED_EXPONENTS: Dict[Key, float] = {("WEREWOLF", "initialize"): 2.2}
+# Smallest costs per call told apart. Below them, the interpreter and the small-block cache of numpy
+# make the cost wander, so they do not count as growth.
+MIN_NS: float = 1000.0
+MIN_BYTES: float = 16384.0
+# Smallest village whose costs are fitted. The beliefs switch from enumerating assignments to sampling them
+# between 15 and 50 agents, and fixed costs hide the growth below that.
+FIT_MIN_SIZE: int = 50
+# Rounds of measurements a callback has to grow too fast in, one after another, to count as a regression.
+ROUNDS: int = 2
+# Roles claimed by the scripted agents, None for no claim, and how often.
+CLAIMS: Tuple[Optional[str], ...] = (None, "VILLAGER", "SEER", "MEDIUM")
+CLAIM_WEIGHTS: Tuple[float, ...] = (0.45, 0.5, 0.03, 0.02)
+
+
+class ScriptedSeat:
+    """Seat of a synthetic agent that leaves its votes to the engine and talks like a plain agent:
+    it comes out once as the role it claims, if any, reports a divination a day if it claims to be a seer,
+    and otherwise estimates, votes and requests at random."""
+    rng: random.Random # Random number generator of the seat.
+    idx: int # Agent index of the seat.
+    size: int # Number of agents in the village.
+    claim: Optional[str] # Role the agent claims, if any.
+    name: str # Name of the player reported to the others, or empty.
+    claimed: bool # Whether the agent has come out.
+    reported: bool # Whether the agent has reported its divination today.
+
+    def __init__(self, rng: random.Random, idx: int, size: int, name: str = "") -> None:
+        self.rng = rng
+        self.idx = idx
+        self.size = size
+        self.name = name
+        self.claim = rng.choices(CLAIMS, CLAIM_WEIGHTS)[0]
+        self.claimed = False
+        self.reported = False
+
+    def agent(self) -> str:
+        return f"Agent[{self.rng.randint(1, self.size):02d}]"
+
+    def request(self, packet: Packet) -> Any:
+        request: str = packet["request"]
+        if request == "DAILY_INITIALIZE":
+            self.reported = False
+        elif request == "TALK":
+            if self.claim is not None and not self.claimed:
+                self.claimed = True
+                return f"COMINGOUT Agent[{self.idx:02d}] {self.claim}"
+            if self.claim == "SEER" and not self.reported:
+                self.reported = True
+                return f"DIVINED {self.agent()} {self.rng.choice(('HUMAN', 'WEREWOLF'))}"
+            kind: int = self.rng.randrange(3)
+            if kind == 0:
+                return f"ESTIMATE {self.agent()} {self.rng.choice(('WEREWOLF', 'POSSESSED', 'VILLAGER'))}"
+            if kind == 1:
+                return f"REQUEST ANY (VOTE {self.agent()})"
+            return f"VOTE {self.agent()}"
+        elif request == "WHISPER":
+            return f"ATTACK {self.agent()}"
+        return None
+
+
+class SyntheticEngine(GameEngine):
+    """Game engine whose scripted seats are spared the game information packets they would not read."""
+
+    def send(self, idx: int, request: str, with_info: bool = True) -> Any:
+        seat: Any = self.seats[idx - 1]
+        if isinstance(seat, ScriptedSeat):
+            return seat.request({"request": request})
+        return super().send(idx, request, with_info)
+
+
+class MeasuredPlayer(AbstractPlayer):
+    """Player recording the time, or the peak of traced allocations, of each callback of the wrapped player."""
+    player: AbstractPlayer # Wrapped player.
+    costs: Dict[Key, List[float]] # Cost of every call of each callback, by role and callback.
+    trace: bool # Whether allocations are measured instead of time.
+    role: str # Role of the current game.
+
+    def __init__(self, player: AbstractPlayer, costs: Dict[Key, List[float]], trace: bool) -> None:
+        self.player = player
+        self.costs = costs
+        self.trace = trace
+        self.role = "none"
+
+    def call(self, callback: str, func: Callable[..., T], *args) -> T:
+        """Call the callback and add its cost."""
+        if self.trace:
+            tracemalloc.reset_peak()
+            before: int = tracemalloc.get_traced_memory()[0]
+            result: T = func(*args)
+            cost: float = tracemalloc.get_traced_memory()[1] - before
+        else:
+            start: int = time.perf_counter_ns()
+            result = func(*args)
+            cost = time.perf_counter_ns() - start
+        self.costs[(self.role, callback)].append(cost)
+        return result
+
+    def attack(self) -> Agent:
+        return self.call("attack", self.player.attack)
+
+    def day_start(self) -> None:
+        self.call("day_start", self.player.day_start)
+
+    def divine(self) -> Agent:
+        return self.call("divine", self.player.divine)
+
+    def finish(self) -> None:
+        self.call("finish", self.player.finish)
+
+    def guard(self) -> Agent:
+        return self.call("guard", self.player.guard)
+
+    def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
+        self.role = game_info.my_role.name
+        self.call("initialize", self.player.initialize, game_info, game_setting)
+
+    def talk(self) -> Content:
+        return self.call("talk", self.player.talk)
+
+    def update(self, game_info: GameInfo) -> None:
+        self.call("update", self.player.update, game_info)
+
+    def vote(self) -> Agent:
+        return self.call("vote", self.player.vote)
+
+    def whisper(self) -> Content:
+        return self.call("whisper", self.player.whisper)
+
+
+def player_name(idx: int) -> str:
+    """Return the name of the player on the seat, the same in every game, if opponents are remembered."""
+    return f"player{idx}" if opponent_store.shared_store is not None else ""
+
+
+def measure(size: int, games: int, days: int, max_talk: int, trace: bool) -> Dict[Key, float]:
+    """Play the games in a village of the given size, with one agent of each role and scripted agents
+    on the other seats, and return the cost per call of each callback of each role: the median in each game,
+    and the least of those over the games, as timeit does, since the background refinement of the beliefs
+    only ever adds to the calls it overlaps. The garbage collector is off while playing for the same reason."""
+    best: Dict[Key, float] = {}
+    for game_seed in range(games):
+        costs: Dict[Key, List[float]] = defaultdict(list)
+        rng: random.Random = random.Random(game_seed)
+        seats: List[Any] = [ScriptedSeat(rng, i, size, player_name(i)) for i in range(1, size + 1)]
+        engine: SyntheticEngine = SyntheticEngine(seats, seed=game_seed)
+        engine.setting["maxTalk"] = max_talk
+        engine.setting["maxWhisper"] = max_talk
+        seen: set = set()
+        for idx, role in sorted(engine.roles.items()):
+            if role not in seen:  # The first agent of each role plays, the others are scripted.
+                seen.add(role)
+                player: MeasuredPlayer = MeasuredPlayer(HyunjiPlayer(game_seed << 16 | idx), costs, trace)
+                engine.seats[idx - 1] = LocalSeat(player, player_name(idx))
+        gc.collect()
+        gc.disable()
+        if trace:
+            tracemalloc.start()
+        try:
+            engine.run(days)
+        finally:
+            if trace:
+                tracemalloc.stop()
+            gc.enable()
+        if talk_log.logs:  # Games cut short still send FINISH, on which the agents release what they hold.
+            raise RuntimeError(f"{len(talk_log.logs)} talk logs left over after game {game_seed} of {size} agents")
+        for key, values in costs.items():
+            best[key] = min(best.get(key, math.inf), statistics.median(values))
+    return best
+
+
+def exponent(sizes: List[int], values: List[float], floor: float) -> float:
+    """Return the growth exponent of the cost: the least-squares slope of its logarithm against the logarithm
+    of the size, over the villages of FIT_MIN_SIZE agents or more, or over all of them if fewer are that large.
+    Fitting all those villages keeps one noisy measurement from deciding the exponent."""
+    points: List[Tuple[int, float]] = [(n, v) for n, v in zip(sizes, values) if n >= FIT_MIN_SIZE]
+    if len(points) < 2:
+        points = list(zip(sizes, values))
+    if len(points) < 2:
+        return 0.0
+    xs: List[float] = [math.log(n) for n, _ in points]
+    ys: List[float] = [math.log(max(v, floor)) for _, v in points]
+    mean_x: float = statistics.fmean(xs)
+    mean_y: float = statistics.fmean(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+
+
+def report(sizes: List[int], results: List[Dict[Key, float]], unit: str, scale: float, floor: float,
+           max_exponent: float) -> Dict[str, str]:
+    """Print the cost of each callback at each size with its growth exponent, and return the callbacks
+    growing faster than the largest exponent, with what is wrong with them."""
+    print(f"{'role':<10} {'callback':<11}" + "".join(f"{s:>10}" for s in sizes) + f"  {unit} per call, exponent")
+    failures: Dict[str, str] = {}
+    for key in sorted(set().union(*results)):
+        values: List[float] = [r.get(key, 0.0) for r in results]
+        slope: float = exponent(sizes, values, floor)
+        mark: str = ""
+        if slope > max(max_exponent, EXPECTED_EXPONENTS.get(key, 0.0)):
+            mark = "  FAIL"
+            failures[f"{key[0]}.{key[1]} {unit}"] = f"{key[0]}.{key[1]} {unit} grows as n^{slope:.2f}"
+        print(f"{key[0]:<10} {key[1]:<11}" + "".join(f"{v / scale:>10.1f}" for v in values) + f"  {slope:5.2f}{mark}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument("-s", type=str, action="store", dest="sizes", default="15,50,200,1000",
+                        help="comma-separated numbers of agents in the village")
+    parser.add_argument("-g", type=int, action="store", dest="games", default=3, help="games per size")
+    parser.add_argument("-d", type=int, action="store", dest="days", default=3, help="days played in each game")
+    parser.add_argument("-t", type=int, action="store", dest="talks", default=10,
+                        help="talks and whispers of each agent per day")
+    parser.add_argument("-e", type=float, action="store", dest="exponent", default=MAX_EXPONENT,
+                        help="largest accepted growth exponent of the cost per call")
+    parser.add_argument("-r", type=int, action="store", dest="rounds", default=ROUNDS,
+                        help="rounds a callback has to grow too fast in to count as a regression")
+    parser.add_argument("-o", action="store_true", dest="opponents",
+                        help="name the players and remember them across games in a store kept in memory")
+    input_args = parser.parse_args()
+    sizes: List[int] = [int(s) for s in input_args.sizes.split(",")]
+    if input_args.opponents:
+        opponent_store.use_store(None)
+    preload()
+    measure(sizes[0], 1, input_args.days, input_args.talks, False)  # Warm up the caches of the first game.
+    failures: Optional[Dict[str, str]] = None
+    for round_number in range(max(input_args.rounds, 1)):
+        if round_number > 0:
+            print(f"\nround {round_number + 1}: measuring again for {len(failures or ())} failures")
+        timings: List[Dict[Key, float]] = [measure(n, input_args.games, input_args.days, input_args.talks, False)
+                                           for n in sizes]
+        allocations: List[Dict[Key, float]] = [measure(n, input_args.games, input_args.days, input_args.talks, True)
+                                               for n in sizes]
+        found: Dict[str, str] = report(sizes, timings, "us", 1000.0, MIN_NS, input_args.exponent)
+        print()
+        found.update(report(sizes, allocations, "KiB", 1024.0, MIN_BYTES, input_args.exponent))
+        # Only callbacks failing in every round count, so that a noisy round does not fail the benchmark.
+        failures = found if failures is None else {k: v for k, v in found.items() if k in failures}
+        if not failures:
+            break
+    for failure in (failures or {}).values():
+        print(f"scaling regression: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
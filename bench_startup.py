@@ -0,0 +1,72 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from typing import Dict, List
+
+from memory import resident_kb
+
+# Script timing the imports in a fresh interpreter.
+IMPORT_SCRIPT: str = """
+import json, time
+start = time.perf_counter()
+import hyunji_agent
+imported = time.perf_counter()
+hyunji_agent.preload()
+preloaded = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "preload_ms": (preloaded - imported) * 1000}))
+"""
+# Directory of the agent, where start.py is.
+AGENT_DIR: str = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_imports() -> Dict[str, float]:
+    """Return the milliseconds to import the agent and to import all roles, in a fresh interpreter."""
+    output: bytes = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], cwd=AGENT_DIR)
+    return json.loads(output)
+
+
+def time_first_name(count: int) -> Dict[str, float]:
+    """Start start.py hosting the given number of agents and return the milliseconds until all of them
+    have answered NAME, with the resident memory of the process at that point."""
+    listener: socket.socket = socket.create_server(("127.0.0.1", 0))
+    port: int = listener.getsockname()[1]
+    start: float = time.perf_counter()
+    process: subprocess.Popen = subprocess.Popen(
+        [sys.executable, "start.py", "-h", "127.0.0.1", "-p", str(port), "-n", "bench", "-c", str(count)],
+        cwd=AGENT_DIR)
+    connections: List[socket.socket] = []
+    try:
+        for _ in range(count):
+            connection, _ = listener.accept()
+            connection.sendall(b'{"request":"NAME"}\n')
+            connections.append(connection)
+        for connection in connections:
+            connection.makefile("rb").readline()
+        elapsed_ms: float = (time.perf_counter() - start) * 1000
+        rss: int = resident_kb(process.pid)
+    finally:
+        for connection in connections:
+            connection.close()
+        listener.close()
+        process.wait()
+    return {"name_ms": elapsed_ms, "rss_kb": rss}
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument("-c", type=str, action="store", dest="counts", default="1,15,60",
+                        help="comma-separated numbers of agents hosted by one process")
+    parser.add_argument("-r", type=int, action="store", dest="repeat", default=5, help="runs of each measurement")
+    input_args = parser.parse_args()
+    imports: List[Dict[str, float]] = [time_imports() for _ in range(input_args.repeat)]
+    print(f"import {statistics.median(i['import_ms'] for i in imports):.1f} ms, "
+          f"all roles {statistics.median(i['preload_ms'] for i in imports):.1f} ms (median of {input_args.repeat})")
+    for n in (int(c) for c in input_args.counts.split(",")):
+        runs: List[Dict[str, float]] = [time_first_name(n) for _ in range(input_args.repeat)]
+        print(f"{n:>4} agents: first NAME answered in {statistics.median(r['name_ms'] for r in runs):.1f} ms, "
+              f"{statistics.median(r['rss_kb'] for r in runs) / 1024:.1f} MiB resident")
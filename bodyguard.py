@@ -1,35 +1,38 @@
-from typing import List
+from typing import Optional
 
-from aiwolf import Agent, GameInfo, GameSetting, Role, Species
+import numpy as np
+from aiwolf import Agent, GameInfo, GameSetting, Role
 from aiwolf.constant import AGENT_NONE
 
+from agent_mask import bit
+from suspicion import CO_FEATURES, TRUSTED_SEER, WEREWOLF_PROBABILITY, weights
 from villager import HyunjiVillager
 
 
 class HyunjiBodyguard(HyunjiVillager):
+    # Weights of the evidence for choosing the guard target.
+    # Non-fake seers first, then mediums, preferring agents unlikely to be werewolves among them.
+    GUARD_WEIGHTS: np.ndarray = weights({TRUSTED_SEER: 2, CO_FEATURES[Role.MEDIUM]: 1, WEREWOLF_PROBABILITY: -0.5})
     # Target of the guard.
     to_be_guarded: Agent
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, seed: Optional[int] = None) -> None:
+        super().__init__(seed)
         self.to_be_guarded = AGENT_NONE
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         super().initialize(game_info, game_setting)
         self.to_be_guarded = AGENT_NONE
 
+    def get_guard_candidates(self) -> int:
+        """Return the bitmask of candidates to be guarded."""
+        self.suspicion.set_column(WEREWOLF_PROBABILITY, self.get_werewolf_probabilities())
+        # Guard one of the alive agents with the strongest evidence of being a power role.
+        return self.suspicion.best(self.GUARD_WEIGHTS, self.alive & self.others)
+
     def guard(self) -> Agent:
-        # Guard one of the alive non-fake seers.
-        candidates: List[Agent] = self.get_alive([j.agent for j in self.divination_reports
-        if j.result != Species.WEREWOLF or j.target != self.me])
-        # Guard one of the alive mediums if there are no candidates.
-        if not candidates:
-            candidates = [a for a in self.comingout_map if self.is_alive(a)
-                          and self.comingout_map[a] == Role.MEDIUM]
-        # Guard one of the alive agents if there are no candidates.
-        if not candidates:
-            candidates = self.get_alive_others(self.game_info.agent_list)
+        candidates: int = self.get_cached_candidates("guard", self.get_guard_candidates)
         # Update a guard candidate if the candidate is changed.
-        if self.to_be_guarded == AGENT_NONE or self.to_be_guarded not in candidates:
-            self.to_be_guarded = self.random_select(candidates)
+        if self.to_be_guarded == AGENT_NONE or not candidates & bit(self.to_be_guarded):
+            self.to_be_guarded = self.random_select(self.select(candidates))
         return self.to_be_guarded if self.to_be_guarded != AGENT_NONE else self.me
@@ -0,0 +1,73 @@
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from aiwolf import (Agent, AttackContentBuilder, ComingoutContentBuilder, Content,
+                    DivinedResultContentBuilder, IdentContentBuilder, Role, Species,
+                    VoteContentBuilder)
+
+# Maximum number of distinct texts kept parsed.
+# Most utterances repeat, and the cap keeps unique texts from growing the cache without bound.
+PARSE_CACHE_SIZE: int = 4096
+# Maximum number of villages whose outgoing contents are kept built.
+TABLE_CACHE_SIZE: int = 8
+# Roles an agent can come out as, and results it can report, in the prebuilt contents.
+TABLE_ROLES: Tuple[Role, ...] = (Role.VILLAGER, Role.SEER, Role.MEDIUM, Role.BODYGUARD,
+                                 Role.POSSESSED, Role.WEREWOLF)
+TABLE_RESULTS: Tuple[Species, ...] = (Species.HUMAN, Species.WEREWOLF)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def compile_content(text: str) -> Content:
+    """Return the content of the text, parsing it only if it is not in the cache.
+    The cache is shared by all agents in the process, so the content must not be modified."""
+    return Content.compile(text)
+
+
+def parse_cache_stats() -> str:
+    """Return hits, misses and size of the parse cache."""
+    info = compile_content.cache_info()
+    return f"parse cache: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize} entries"
+
+
+class ContentTable:
+    """Contents an agent can talk or whisper in a village, built with their text once for all its agents.
+    Contents outside the table, such as claims of unusual roles, are built when asked for."""
+    votes: Dict[Agent, Content] # VOTE for each agent.
+    attacks: Dict[Agent, Content] # ATTACK on each agent.
+    comingouts: Dict[Tuple[Agent, Role], Content] # COMINGOUT of each agent as each role.
+    divined: Dict[Tuple[Agent, Species], Content] # DIVINED of each agent with each result.
+    identified: Dict[Tuple[Agent, Species], Content] # IDENTIFIED of each agent with each result.
+
+    def __init__(self, agents: Tuple[Agent, ...]) -> None:
+        self.votes = {a: Content(VoteContentBuilder(a)) for a in agents}
+        self.attacks = {a: Content(AttackContentBuilder(a)) for a in agents}
+        self.comingouts = {(a, r): Content(ComingoutContentBuilder(a, r)) for a in agents for r in TABLE_ROLES}
+        self.divined = {(a, s): Content(DivinedResultContentBuilder(a, s)) for a in agents for s in TABLE_RESULTS}
+        self.identified = {(a, s): Content(IdentContentBuilder(a, s)) for a in agents for s in TABLE_RESULTS}
+
+    def vote(self, target: Agent) -> Content:
+        content: Optional[Content] = self.votes.get(target)
+        return content if content is not None else Content(VoteContentBuilder(target))
+
+    def attack(self, target: Agent) -> Content:
+        content: Optional[Content] = self.attacks.get(target)
+        return content if content is not None else Content(AttackContentBuilder(target))
+
+    def comingout(self, target: Agent, role: Role) -> Content:
+        content: Optional[Content] = self.comingouts.get((target, role))
+        return content if content is not None else Content(ComingoutContentBuilder(target, role))
+
+    def divined_result(self, target: Agent, result: Species) -> Content:
+        content: Optional[Content] = self.divined.get((target, result))
+        return content if content is not None else Content(DivinedResultContentBuilder(target, result))
+
+    def ident(self, target: Agent, result: Species) -> Content:
+        content: Optional[Content] = self.identified.get((target, result))
+        return content if content is not None else Content(IdentContentBuilder(target, result))
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def content_table(agents: Tuple[Agent, ...]) -> ContentTable:
+    """Return the outgoing contents of the village of the agents, building them on its first game.
+    The table is shared by all agents in the process, so its contents must not be modified."""
+    return ContentTable(agents)
@@ -0,0 +1,522 @@
+import random
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiwolf import (AbstractPlayer, Agent, GameInfo, GameSetting, Judge, Role,
+                    Species, Status, Talk, Vote, Whisper)
+
+# Role compositions of the standard villages.
+ROLE_NUM_MAP_5: Dict[Role, int] = {Role.VILLAGER: 2, Role.SEER: 1, Role.POSSESSED: 1, Role.WEREWOLF: 1}
+ROLE_NUM_MAP_15: Dict[Role, int] = {Role.VILLAGER: 8, Role.SEER: 1, Role.MEDIUM: 1, Role.BODYGUARD: 1,
+                                    Role.POSSESSED: 1, Role.WEREWOLF: 3}
+
+Packet = Dict[str, Any]
+
+# Field of the game information of INITIALIZE naming the player of each agent index.
+# The AIWolf server does not send it, so the players of its games stay unnamed;
+# the local engine and the stand-in server send the names of the seats that have one.
+NAME_MAP: str = "agentNameMap"
+
+
+def default_role_num_map(player_num: int) -> Dict[Role, int]:
+    """Return the role composition of a village with the given number of players."""
+    if player_num == 5:
+        return dict(ROLE_NUM_MAP_5)
+    if player_num == 15:
+        return dict(ROLE_NUM_MAP_15)
+    # Scale the 15-player composition for synthetic villages.
+    werewolves: int = max(1, player_num // 5)
+    role_num_map: Dict[Role, int] = {Role.SEER: 1, Role.MEDIUM: 1, Role.BODYGUARD: 1,
+                                     Role.POSSESSED: 1, Role.WEREWOLF: werewolves}
+    role_num_map[Role.VILLAGER] = player_num - sum(role_num_map.values())
+    return role_num_map
+
+
+def game_setting_packet(role_num_map: Dict[Role, int], seed: int = 0, time_limit: int = 1000) -> Dict[str, Any]:
+    """Return the game setting in the JSON form sent by the AIWolf server."""
+    return {
+        "enableNoAttack": False,
+        "enableNoExecution": False,
+        "enableRoleRequest": True,
+        "maxAttackRevote": 1,
+        "maxRevote": 1,
+        "maxSkip": 2,
+        "maxTalk": 10,
+        "maxTalkTurn": 20,
+        "maxWhisper": 10,
+        "maxWhisperTurn": 20,
+        "playerNum": sum(role_num_map.values()),
+        "randomSeed": seed,
+        "roleNumMap": {r.name: role_num_map.get(r, 0) for r in Role},
+        "talkOnFirstDay": True,
+        "timeLimit": time_limit,
+        "validateUtterance": True,
+        "votableInFirstDay": False,
+        "voteVisible": True,
+        "whisperBeforeRevote": False,
+    }
+
+
+class LocalSeat:
+    """A seat occupied by an in-process player, driven the same way TcpipClient drives it."""
+    player: AbstractPlayer # The player sitting on the seat.
+    name: str # Name of the player reported to the others, or empty.
+    game_info: Optional[GameInfo] # Latest game information sent to the player.
+    compiled: Dict[Tuple[Any, ...], Any] # Talks, whispers and votes compiled in this game, by class and key.
+    names: Dict[Agent, str] # Names of the players of the agents of this game, as far as they are reported.
+    sources: Dict[str, Any] # Keys of the engine values the fields of the game information were last made from.
+    no_agent: Optional[Agent] # What the game information holds where the agent index is -1.
+
+    def __init__(self, player: AbstractPlayer, name: str = "") -> None:
+        self.player = player
+        self.name = name
+        self.game_info = None
+        self.compiled = {}
+        self.names = {}
+        self.sources = {}
+        self.no_agent = None
+
+    def changed(self, field: str, key: Any) -> bool:
+        """Return whether the engine value the field is made from has changed since the field was last made,
+        telling the values apart by the given key, and remember the key."""
+        if field in self.sources and self.sources[field] == key:
+            return False
+        self.sources[field] = key
+        return True
+
+    def agent(self, idx: int) -> Optional[Agent]:
+        """Return the agent of the index as the game information holds it."""
+        return Agent(idx) if idx != -1 else self.no_agent
+
+    def utterances(self, previous: List[Any], history: List[Dict[str, Any]], cls: Any) -> List[Any]:
+        """Return the utterance objects of the history, reusing the ones already compiled."""
+        result: List[Any] = previous[:len(history)] if len(previous) <= len(history) else []
+        for u in history[len(result):]:
+            # Day and index tell an utterance apart within a game, unlike the id of its packet, which is reused.
+            key: Tuple[Any, int, int] = (cls, u["day"], u["idx"])
+            utterance: Any = self.compiled.get(key)
+            if utterance is None:
+                utterance = self.compiled[key] = cls.compile(u)
+            result.append(utterance)
+        return result
+
+    def votes(self, votes: List[Dict[str, Any]]) -> List[Vote]:
+        """Return the vote objects of the votes, reusing the ones already compiled."""
+        result: List[Vote] = []
+        for v in votes:
+            key: Tuple[Any, ...] = (Vote, v["day"], v["agent"], v["target"])
+            vote: Optional[Vote] = self.compiled.get(key)
+            if vote is None:
+                vote = self.compiled[key] = Vote.compile(v)
+            result.append(vote)
+        return result
+
+    def request(self, packet: Packet) -> Any:
+        """Deliver the packet to the player and return its response.
+        Talk and whisper requests return the text, night and vote requests the agent index."""
+        request: str = packet["request"]
+        info: Optional[Dict[str, Any]] = packet.get("gameInfo")
+        previous: Optional[GameInfo] = self.game_info
+        if request == "INITIALIZE":
+            self.names = {Agent(int(i)): n for i, n in (info or {}).get(NAME_MAP, {}).items()}
+        if info is not None:
+            # Talks of the same day are append-only, so only the new ones need to be compiled.
+            self.game_info = GameInfo(dict(info, talkList=[], whisperList=[]))
+            same_day: bool = previous is not None and previous.day == info["day"]
+            self.game_info.talk_list = self.utterances(previous.talk_list if same_day else [],
+                                                       info["talkList"], Talk)
+            self.game_info.whisper_list = self.utterances(previous.whisper_list if same_day else [],
+                                                          info["whisperList"], Whisper)
+            self.game_info.agent_name_map = self.names  # type: ignore
+            self.sources = {}
+            if request == "INITIALIZE":  # Nobody has been executed yet.
+                self.no_agent = self.game_info.executed_agent
+        game_info: Optional[GameInfo] = self.game_info
+        if game_info is not None:
+            if packet.get("talkHistory"):
+                game_info.talk_list.extend(self.utterances([], packet["talkHistory"], Talk))
+            if packet.get("whisperHistory"):
+                game_info.whisper_list.extend(self.utterances([], packet["whisperHistory"], Whisper))
+        if request == "INITIALIZE":
+            self.player.initialize(game_info, GameSetting(packet["gameSetting"]))
+            return None
+        self.player.update(game_info)
+        if request == "DAILY_INITIALIZE":
+            self.player.day_start()
+        elif request == "FINISH":
+            self.player.finish()
+        elif request == "TALK":
+            return self.player.talk().text
+        elif request == "WHISPER":
+            return self.player.whisper().text
+        elif request == "VOTE":
+            return self.player.vote().agent_idx
+        elif request == "DIVINE":
+            return self.player.divine().agent_idx
+        elif request == "GUARD":
+            return self.player.guard().agent_idx
+        elif request == "ATTACK":
+            return self.player.attack().agent_idx
+        return None
+
+
+def result_key(result: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, ...]]:
+    """Return the key of a divination or identification result, which may be completed in place."""
+    return tuple(result.values()) if result is not None else None
+
+
+class GameEngine:
+    """Plays one AIWolf game among the given seats without any server."""
+    seats: List[Any] # Seats indexed by agent index - 1.
+    agents: List[Agent] # Agents in the village.
+    roles: Dict[int, Role] # Mapping between an agent index and its role.
+    alive: Dict[int, bool] # Mapping between an agent index and whether it is alive.
+    setting: Dict[str, Any] # Game setting packet.
+    rng: random.Random # Random number generator of the game.
+    day: int # Current day.
+    talks: List[Dict[str, Any]] # Talks of the current day.
+    whispers: List[Dict[str, Any]] # Whispers of the current day.
+    talk_heads: List[int] # Index of the next talk to be sent to each seat.
+    whisper_heads: List[int] # Index of the next whisper to be sent to each seat.
+    divine_result: Optional[Dict[str, Any]] # Divination result of the last night.
+    medium_result: Optional[Dict[str, Any]] # Identification result of the last execution.
+    executed: int # Agent executed yesterday.
+    attacked: int # Agent attacked last night.
+    guarded: int # Agent guarded last night.
+    last_dead: List[int] # Agents died last night.
+    vote_list: List[Dict[str, Any]] # Latest votes for execution.
+    attack_vote_list: List[Dict[str, Any]] # Latest votes for attack.
+    winner: Optional[Species] # Winning side, HUMAN or WEREWOLF.
+    names: Dict[str, str] # Names of the players of the seats that have one, by agent index.
+    compiled_logs: Dict[Any, Tuple[List[Dict[str, Any]], List[Any]]] # Logs of the day and their objects, by class.
+
+    def __init__(self, seats: List[Any], role_num_map: Optional[Dict[Role, int]] = None,
+                 seed: Optional[int] = None, time_limit: int = 1000) -> None:
+        self.seats = [LocalSeat(s) if isinstance(s, AbstractPlayer) else s for s in seats]
+        compiled: Dict[Tuple[Any, ...], Any] = {}
+        for seat in self.seats:  # Local seats share compiled talks and votes, which are the same for all of them.
+            if isinstance(seat, LocalSeat):
+                seat.compiled = compiled
+        n: int = len(self.seats)
+        if role_num_map is None:
+            role_num_map = default_role_num_map(n)
+        if sum(role_num_map.values()) != n:
+            raise ValueError("The number of seats does not match the role composition.")
+        self.rng = random.Random(seed)
+        self.setting = game_setting_packet(role_num_map, seed if seed is not None else 0, time_limit)
+        self.agents = [Agent(i) for i in range(1, n + 1)]
+        role_list: List[Role] = [r for r in role_num_map for _ in range(role_num_map[r])]
+        self.rng.shuffle(role_list)
+        self.roles = {i: role_list[i - 1] for i in range(1, n + 1)}
+        self.alive = {i: True for i in range(1, n + 1)}
+        self.day = 0
+        self.talks = []
+        self.whispers = []
+        self.talk_heads = [0] * n
+        self.whisper_heads = [0] * n
+        self.divine_result = None
+        self.medium_result = None
+        self.executed = -1
+        self.attacked = -1
+        self.guarded = -1
+        self.last_dead = []
+        self.vote_list = []
+        self.attack_vote_list = []
+        self.winner = None
+        self.names = {str(i): s.name for i, s in enumerate(self.seats, 1) if getattr(s, "name", "")}
+        self.compiled_logs = {}
+
+    def alive_agents(self) -> List[int]:
+        """Return indices of the alive agents."""
+        return [i for i in self.alive if self.alive[i]]
+
+    def alive_with_role(self, role: Role) -> List[int]:
+        """Return indices of the alive agents having the given role."""
+        return [i for i in self.alive if self.alive[i] and self.roles[i] == role]
+
+    def game_info_packet(self, idx: int, finished: bool = False) -> Dict[str, Any]:
+        """Return the game information seen by the agent in the JSON form sent by the server."""
+        role: Role = self.roles[idx]
+        wolf: bool = role == Role.WEREWOLF
+        if finished:
+            role_map = {str(i): r.name for i, r in self.roles.items()}
+        elif wolf:
+            role_map = {str(i): r.name for i, r in self.roles.items() if r == Role.WEREWOLF}
+        else:
+            role_map = {str(idx): role.name}
+        return {
+            "agent": idx,
+            "attackVoteList": self.attack_vote_list if wolf else [],
+            "attackedAgent": self.attacked if wolf else -1,
+            "cursedFox": -1,
+            "day": self.day,
+            "divineResult": self.divine_result if role == Role.SEER else None,
+            "executedAgent": self.executed,
+            "existingRoleList": [r for r in self.setting["roleNumMap"] if self.setting["roleNumMap"][r] > 0],
+            "guardedAgent": self.guarded if role == Role.BODYGUARD else -1,
+            "lastDeadAgentList": self.last_dead,
+            "latestAttackVoteList": self.attack_vote_list if wolf else [],
+            "latestExecutedAgent": self.executed,
+            "latestVoteList": self.vote_list,
+            "mediumResult": self.medium_result if role == Role.MEDIUM else None,
+            "remainTalkMap": {},
+            "remainWhisperMap": {},
+            "roleMap": role_map,
+            "statusMap": {str(i): "ALIVE" if a else "DEAD" for i, a in self.alive.items()},
+            "talkList": self.talks,
+            "voteList": self.vote_list,
+            "whisperList": self.whispers if wolf else [],
+        }
+
+    def utterance_objects(self, log: List[Dict[str, Any]], cls: Any) -> List[Any]:
+        """Return the talk or whisper objects of the log of the day, compiling only the ones said since the last call.
+        The objects are shared by all local seats, as everybody is told the same talks."""
+        source, objects = self.compiled_logs.get(cls, (None, []))
+        if source is not log:  # A new day has begun with a new log.
+            objects = []
+            self.compiled_logs[cls] = (log, objects)
+        objects.extend(cls.compile(u) for u in log[len(objects):])
+        return objects
+
+    def update_game_info(self, idx: int, seat: LocalSeat) -> None:
+        """Bring the game information of a local seat up to date in place.
+        Only what changed since its previous request is made anew: the talks and whispers said since then,
+        the statuses after an execution or a new day, and the votes and results that were replaced."""
+        info: GameInfo = seat.game_info
+        role: Role = self.roles[idx]
+        wolf: bool = role == Role.WEREWOLF
+        if info.day != self.day:
+            info.day = self.day
+            info.talk_list = []
+            info.whisper_list = []
+        if self.talk_heads[idx - 1] < len(self.talks):
+            info.talk_list.extend(self.utterance_objects(self.talks, Talk)[self.talk_heads[idx - 1]:])
+            self.talk_heads[idx - 1] = len(self.talks)
+        if wolf and self.whisper_heads[idx - 1] < len(self.whispers):
+            info.whisper_list.extend(self.utterance_objects(self.whispers, Whisper)[self.whisper_heads[idx - 1]:])
+            self.whisper_heads[idx - 1] = len(self.whispers)
+        # Agents die only at executions and attacks, and the last dead are replaced at dawn.
+        if seat.changed("statusMap", (self.day, self.executed, tuple(self.last_dead))):
+            for i, alive in self.alive.items():
+                info.status_map[self.agents[i - 1]] = Status.ALIVE if alive else Status.DEAD
+            info.last_dead_agent_list = [self.agents[i - 1] for i in self.last_dead]
+        info.executed_agent = info.latest_executed_agent = seat.agent(self.executed)
+        # Vote lists are replaced by every vote, or, in replays, grow in place.
+        if seat.changed("voteList", (self.vote_list, len(self.vote_list))):
+            info.vote_list = seat.votes(self.vote_list)
+            info.latest_vote_list = list(info.vote_list)
+        if wolf:
+            if seat.changed("attackVoteList", (self.attack_vote_list, len(self.attack_vote_list))):
+                info.attack_vote_list = seat.votes(self.attack_vote_list)
+                info.latest_attack_vote_list = list(info.attack_vote_list)
+            info.attacked_agent = seat.agent(self.attacked)
+        elif role == Role.SEER:
+            if seat.changed("divineResult", result_key(self.divine_result)):
+                info.divine_result = Judge.compile(self.divine_result) if self.divine_result else None
+        elif role == Role.MEDIUM:
+            if seat.changed("mediumResult", result_key(self.medium_result)):
+                info.medium_result = Judge.compile(self.medium_result) if self.medium_result else None
+        elif role == Role.BODYGUARD:
+            info.guarded_agent = seat.agent(self.guarded)
+
+    def send(self, idx: int, request: str, with_info: bool = True) -> Any:
+        """Send a request to the agent and return its response.
+        Local seats have their game information updated in place instead of being sent a packet."""
+        seat: Any = self.seats[idx - 1]
+        if isinstance(seat, LocalSeat) and seat.game_info is not None:
+            self.update_game_info(idx, seat)
+            return seat.request({"request": request})
+        packet: Packet = {"request": request}
+        if with_info:
+            packet["gameInfo"] = self.game_info_packet(idx)
+            self.talk_heads[idx - 1] = len(self.talks)
+            self.whisper_heads[idx - 1] = len(self.whispers)
+        else:
+            packet["talkHistory"] = self.talks[self.talk_heads[idx - 1]:]
+            self.talk_heads[idx - 1] = len(self.talks)
+            if self.roles[idx] == Role.WEREWOLF:
+                packet["whisperHistory"] = self.whispers[self.whisper_heads[idx - 1]:]
+                self.whisper_heads[idx - 1] = len(self.whispers)
+        return seat.request(packet)
+
+    def broadcast(self, request: str) -> None:
+        """Send a request that requires no response to every agent."""
+        for idx in self.alive:
+            self.send(idx, request)
+
+    def utterances(self, request: str, speakers: List[int], log: List[Dict[str, Any]],
+                   max_count: int, max_turn: int) -> None:
+        """Run talk or whisper turns among the speakers until everyone is over."""
+        remain: Dict[int, int] = {i: max_count for i in speakers}
+        skips: Dict[int, int] = {i: 0 for i in speakers}
+        max_skip: int = self.setting["maxSkip"]
+        for turn in range(max_turn):
+            order: List[int] = list(speakers)
+            self.rng.shuffle(order)
+            all_over: bool = True
+            for i in order:
+                text: str = "Over"
+                if remain[i] > 0:
+                    text = self.send(i, request, with_info=False) or "Skip"
+                    if text == "Skip":
+                        skips[i] += 1
+                        if skips[i] > max_skip:
+                            text = "Over"
+                    elif text != "Over":
+                        skips[i] = 0
+                        remain[i] -= 1
+                if text != "Over":
+                    all_over = False
+                log.append({"agent": i, "day": self.day, "idx": len(log), "text": text, "turn": turn})
+            if all_over:
+                break
+
+    def collect_vote(self, voters: List[int], request: str, valid: List[int]) -> List[Dict[str, Any]]:
+        """Ask the voters for their targets. Invalid targets are replaced with random valid ones."""
+        votes: List[Dict[str, Any]] = []
+        for i in voters:
+            target: Optional[int] = self.send(i, request)
+            candidates: List[int] = [v for v in valid if v != i]
+            if target not in candidates and candidates:
+                target = self.rng.choice(candidates)
+            if target is not None:
+                votes.append({"agent": i, "day": self.day, "target": target})
+        return votes
+
+    def decide(self, voters: List[int], request: str, valid: List[int], max_revote: int) -> int:
+        """Hold a vote among the voters and return the chosen agent, or -1 if nobody is chosen."""
+        for revote in range(max_revote + 1):
+            votes = self.collect_vote(voters, request, valid)
+            if request == "VOTE":
+                self.vote_list = votes
+            else:
+                self.attack_vote_list = votes
+            counter = Counter(v["target"] for v in votes)
+            if not counter:
+                return -1
+            top: int = max(counter.values())
+            chosen: List[int] = [t for t in counter if counter[t] == top]
+            if len(chosen) == 1:
+                return chosen[0]
+        return self.rng.choice(chosen)
+
+    def check_winner(self) -> bool:
+        """Decide the winning side if the game is over."""
+        wolves: int = len(self.alive_with_role(Role.WEREWOLF))
+        humans: int = len(self.alive_agents()) - wolves
+        if wolves == 0:
+            self.winner = Species.HUMAN
+        elif wolves >= humans:
+            self.winner = Species.WEREWOLF
+        return self.winner is not None
+
+    def day_phase(self) -> None:
+        """Talk and whisper during the daytime."""
+        self.talks = []
+        self.whispers = []
+        self.talk_heads = [0] * len(self.seats)
+        self.whisper_heads = [0] * len(self.seats)
+        self.broadcast("DAILY_INITIALIZE")
+        if self.day > 0 or self.setting["talkOnFirstDay"]:
+            self.utterances("TALK", self.alive_agents(), self.talks,
+                            self.setting["maxTalk"], self.setting["maxTalkTurn"])
+        wolves: List[int] = self.alive_with_role(Role.WEREWOLF)
+        if len(wolves) > 1:
+            self.utterances("WHISPER", wolves, self.whispers,
+                            self.setting["maxWhisper"], self.setting["maxWhisperTurn"])
+        self.broadcast("DAILY_FINISH")
+
+    def night_phase(self) -> None:
+        """Execute, divine, guard and attack."""
+        self.executed = -1
+        self.medium_result = None
+        if self.day > 0:
+            alive: List[int] = self.alive_agents()
+            self.executed = self.decide(alive, "VOTE", alive, self.setting["maxRevote"])
+            if self.executed != -1:
+                self.alive[self.executed] = False
+                species: str = "WEREWOLF" if self.roles[self.executed] == Role.WEREWOLF else "HUMAN"
+                self.medium_result = {"agent": 0, "day": self.day, "target": self.executed, "result": species}
+            if self.check_winner():
+                return
+        alive = self.alive_agents()
+        self.divine_result = None
+        for seer in self.alive_with_role(Role.SEER):
+            target: Optional[int] = self.send(seer, "DIVINE")
+            if target in alive and target != seer:
+                species = "WEREWOLF" if self.roles[target] == Role.WEREWOLF else "HUMAN"
+                self.divine_result = {"agent": seer, "day": self.day, "target": target, "result": species}
+        self.guarded = -1
+        self.attacked = -1
+        self.last_dead = []
+        if self.day > 0:
+            for bodyguard in self.alive_with_role(Role.BODYGUARD):
+                target = self.send(bodyguard, "GUARD")
+                if target in alive and target != bodyguard:
+                    self.guarded = target
+            wolves: List[int] = self.alive_with_role(Role.WEREWOLF)
+            humans: List[int] = [i for i in alive if self.roles[i] != Role.WEREWOLF]
+            attacked: int = self.decide(wolves, "ATTACK", humans, self.setting["maxAttackRevote"])
+            if attacked != -1:
+                self.attacked = attacked
+                if attacked != self.guarded:
+                    self.alive[attacked] = False
+                    self.last_dead = [attacked]
+        if self.medium_result is not None:
+            for medium in self.alive_with_role(Role.MEDIUM):
+                self.medium_result["agent"] = medium
+        self.check_winner()
+
+    def run(self, max_days: Optional[int] = None) -> Optional[Species]:
+        """Play the game to the end, or until the given number of days have passed,
+        and return the winning side, or None if the game was cut short."""
+        for idx in self.alive:
+            info: Dict[str, Any] = self.game_info_packet(idx)
+            if self.names:
+                info[NAME_MAP] = self.names
+            self.seats[idx - 1].request({"request": "INITIALIZE", "gameInfo": info, "gameSetting": self.setting})
+        while self.winner is None and (max_days is None or self.day < max_days):
+            self.day_phase()
+            self.night_phase()
+            self.day += 1
+        for idx in self.alive:
+            self.seats[idx - 1].request({"request": "FINISH", "gameInfo": self.game_info_packet(idx, True)})
+        return self.winner
+
+
+if __name__ == "__main__":
+    import belief
+    import opponent_store
+    from content_cache import parse_cache_stats
+    from hyunji_agent import HyunjiPlayer
+
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument("-n", type=int, action="store", dest="games", default=1000)
+    parser.add_argument("-p", type=int, action="store", dest="players", default=5)
+    parser.add_argument("-s", type=int, action="store", dest="seed", default=0)
+    parser.add_argument("-o", type=str, action="store", dest="opponents",
+                        help="file remembering the players, named player1 and on, across games")
+    input_args = parser.parse_args()
+    belief.use_fixed_refinement()
+    players: List[AbstractPlayer] = [HyunjiPlayer() for _ in range(input_args.players)]
+    if input_args.opponents:
+        opponent_store.use_store(input_args.opponents)
+    wins: Counter = Counter()
+    start: float = time.perf_counter()
+    for g in range(input_args.games):
+        seats: List[Any] = [LocalSeat(p, f"player{i}" if input_args.opponents else "")
+                            for i, p in enumerate(players, 1)]
+        wins[GameEngine(seats, seed=input_args.seed + g).run()] += 1
+    elapsed: float = time.perf_counter() - start
+    print(f"{input_args.games} games in {elapsed:.2f}s ({input_args.games / elapsed:.0f} games/s)")
+    print(parse_cache_stats())
+    for side, count in wins.items():
+        print(f"{side.name}: {count / input_args.games:.3f}")
+    if opponent_store.shared_store is not None:
+        for i in range(1, input_args.players + 1):
+            stats: opponent_store.OpponentStats = opponent_store.shared_store.get(f"player{i}")
+            print(f"player{i}: {stats.games} games, werewolf rate {stats.werewolf_rate:.3f}, "
+                  f"{stats.seer_claims} seer claims, {stats.votes} votes")
+        opponent_store.shared_store.close()
@@ -0,0 +1,325 @@
+import logging
+import os
+import struct
+import threading
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from aiwolf import (AbstractPlayer, Agent, Content, GameInfo, GameSetting,
+                    Role, Species, Status, Topic)
+
+from hyunji_agent import HyunjiPlayer
+from talk_log import TalkLog
+from villager import HyunjiVillager
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Largest agent index plus one. Agent-wise features have a row for every index, the 0th unused.
+# Games of larger villages are not exported.
+MAX_AGENTS: int = 16
+# Largest report count that fits the reports column. Larger counts are clamped to it.
+MAX_REPORTS: int = np.iinfo(np.uint16).max
+# Rows buffered by a writer before they are appended to the files.
+BATCH_ROWS: int = 16384
+# Rows of a game allocated at first. Longer games double them.
+GAME_ROWS: int = 128
+# Size of the header of the .npy files, large enough for any number of rows,
+# so that it can be rewritten in place as rows are appended.
+NPY_HEADER_SIZE: int = 128
+NPY_MAGIC: bytes = b"\x93NUMPY\x01\x00"
+
+# Codes of the roles and of the decisions.
+ROLES: Tuple[Role, ...] = (Role.VILLAGER, Role.SEER, Role.MEDIUM, Role.BODYGUARD, Role.POSSESSED, Role.WEREWOLF)
+ROLE_CODES: Dict[Role, int] = {r: i for i, r in enumerate(ROLES)}
+TOPIC_CODES: Dict[Topic, int] = {t: i for i, t in enumerate(Topic)}
+TALK: int = 0
+WHISPER: int = 1
+VOTE: int = 2
+DIVINE: int = 3
+GUARD: int = 4
+ATTACK: int = 5
+
+# Report counts, the columns of the reports feature.
+DIVINED_HUMAN: int = 0 # Divined as a human.
+DIVINED_WEREWOLF: int = 1 # Divined as a werewolf.
+IDENTIFIED_HUMAN: int = 2 # Identified as a human.
+IDENTIFIED_WEREWOLF: int = 3 # Identified as a werewolf.
+VOTE_TALK: int = 4 # Said to be voted for.
+NUM_REPORTS: int = 5
+
+# Columns of the exported rows: data type and shape of a row.
+COLUMNS: Dict[str, Tuple[np.dtype, Tuple[int, ...]]] = {
+    "game": (np.dtype(np.int64), ()), # Game of the deciding agent, unique across the writers of an export.
+    "day": (np.dtype(np.int16), ()), # Day of the decision.
+    "agent": (np.dtype(np.uint8), ()), # Agent index of the deciding agent.
+    "role": (np.dtype(np.int8), ()), # Code of the role of the deciding agent.
+    "action": (np.dtype(np.int8), ()), # Code of the decision, such as TALK or VOTE.
+    "topic": (np.dtype(np.int8), ()), # Code of the topic of the talk or whisper, -1 for the other decisions.
+    "target": (np.dtype(np.uint8), ()), # Agent index of the target, 0 if none.
+    "alive": (np.dtype(np.bool_), (MAX_AGENTS,)), # Whether each agent is alive.
+    "claims": (np.dtype(np.bool_), (MAX_AGENTS, len(ROLES))), # Role each agent claims.
+    "reports": (np.dtype(np.uint16), (MAX_AGENTS, NUM_REPORTS)), # Reports about each agent so far.
+    "won": (np.dtype(np.int8), ()), # Whether the deciding agent won the game, -1 if unknown.
+}
+
+
+def exportable(player_num: int) -> bool:
+    """Return whether the games of a village with the given number of players can be exported."""
+    return player_num < MAX_AGENTS
+
+
+def npy_header(dtype: np.dtype, shape: Tuple[int, ...]) -> bytes:
+    """Return the .npy header of an array, padded to NPY_HEADER_SIZE."""
+    header: bytes = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False,
+                          "shape": shape}).encode("latin1")
+    header += b" " * (NPY_HEADER_SIZE - len(NPY_MAGIC) - 2 - len(header) - 1) + b"\n"
+    return NPY_MAGIC + struct.pack("<H", len(header)) + header
+
+
+def new_columns(rows: int) -> Dict[str, np.ndarray]:
+    """Return empty columns of the given number of rows."""
+    return {name: np.zeros((rows,) + shape, dtype) for name, (dtype, shape) in COLUMNS.items()}
+
+
+class ExportWriter:
+    """Appends rows in batches to one .npy file per column in a directory of its own.
+    The headers are rewritten after every batch, so the files can be loaded at any time."""
+    directory: str # Directory of the column files.
+    files: Dict[str, BinaryIO] # Column files, once opened.
+    batch: Dict[str, np.ndarray] # Rows waiting to be appended.
+    pending: int # Number of rows waiting to be appended.
+    rows: int # Number of rows appended to the files.
+    games: int # Number of games started.
+    lock: threading.Lock # Lock of the batch, filled by agents on several threads.
+
+    def __init__(self, directory: str) -> None:
+        self.directory = os.path.join(directory, f"part-{os.getpid()}-{id(self):x}")
+        self.files = {}
+        self.batch = new_columns(BATCH_ROWS)
+        self.pending = 0
+        self.rows = 0
+        self.games = 0
+        self.lock = threading.Lock()
+
+    def new_game(self) -> int:
+        """Return the number of a new game, unique across the processes writing to the same directory."""
+        with self.lock:
+            self.games += 1
+            return os.getpid() << 32 | self.games
+
+    def append(self, columns: Dict[str, np.ndarray], count: int) -> None:
+        """Append the first rows of the columns, writing the batch out whenever it is full."""
+        with self.lock:
+            start: int = 0
+            while start < count:
+                n: int = min(count - start, BATCH_ROWS - self.pending)
+                for name, column in columns.items():
+                    self.batch[name][self.pending:self.pending + n] = column[start:start + n]
+                self.pending += n
+                start += n
+                if self.pending == BATCH_ROWS:
+                    self.write()
+
+    def write(self) -> None:
+        """Append the batch to the column files."""
+        if self.pending == 0:
+            return
+        if not self.files:
+            os.makedirs(self.directory, exist_ok=True)
+            for name, (dtype, shape) in COLUMNS.items():
+                f: BinaryIO = open(os.path.join(self.directory, f"{name}.npy"), "wb")
+                f.write(npy_header(dtype, (0,) + shape))
+                self.files[name] = f
+        self.rows += self.pending
+        for name, (dtype, shape) in COLUMNS.items():
+            f = self.files[name]
+            f.seek(0, os.SEEK_END)
+            f.write(self.batch[name][:self.pending].tobytes())
+            f.seek(0)
+            f.write(npy_header(dtype, (self.rows,) + shape))
+        self.pending = 0
+
+    def flush(self) -> None:
+        """Write out the rows waiting in the batch."""
+        with self.lock:
+            self.write()
+            for f in self.files.values():
+                f.flush()
+
+    def close(self) -> None:
+        """Write out the remaining rows and close the files."""
+        self.flush()
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files = {}
+
+
+class GameRows:
+    """Rows of the decisions of one agent in the game being played, kept until the outcome is known.
+    The report counts are kept up to date from the histories of the talk log as they grow."""
+    columns: Dict[str, np.ndarray] # Rows of the game.
+    count: int # Number of rows.
+    reports: np.ndarray # Report counts of each agent so far.
+    cursors: List[int] # Reports counted so far, of divinations, identifications and vote talks.
+
+    def __init__(self) -> None:
+        self.columns = new_columns(GAME_ROWS)
+        self.count = 0
+        self.reports = np.zeros((MAX_AGENTS, NUM_REPORTS), np.int64)
+        self.cursors = [0, 0, 0]
+
+    def reset(self) -> None:
+        """Forget the rows of the previous game."""
+        self.count = 0
+        self.reports.fill(0)
+        self.cursors = [0, 0, 0]
+
+    def count_reports(self, role: HyunjiVillager) -> None:
+        """Count the reports added to the histories since the last decision."""
+        log: TalkLog = role.talk_log
+        for judge in log.divination_reports.since(self.cursors[0]):
+            self.reports[judge.target.agent_idx, DIVINED_WEREWOLF if judge.result == Species.WEREWOLF
+                         else DIVINED_HUMAN] += 1
+        for judge in log.identification_reports.since(self.cursors[1]):
+            self.reports[judge.target.agent_idx, IDENTIFIED_WEREWOLF if judge.result == Species.WEREWOLF
+                         else IDENTIFIED_HUMAN] += 1
+        for vote in log.vote_talk.since(self.cursors[2]):
+            self.reports[vote.target.agent_idx, VOTE_TALK] += 1
+        self.cursors = [log.divination_reports.total, log.identification_reports.total, log.vote_talk.total]
+
+    def add(self, role: HyunjiVillager, action: int, target: Optional[Agent], topic: Optional[Topic] = None) -> None:
+        """Add a row of the decision made by the role in the current state of its game."""
+        if self.count == len(self.columns["game"]):
+            grown: Dict[str, np.ndarray] = new_columns(2 * self.count)
+            for name, column in self.columns.items():
+                grown[name][:self.count] = column
+            self.columns = grown
+        self.count_reports(role)
+        c: Dict[str, np.ndarray] = self.columns
+        i: int = self.count
+        game_info: GameInfo = role.game_info
+        c["day"][i] = game_info.day
+        c["agent"][i] = role.me.agent_idx
+        c["role"][i] = ROLE_CODES.get(game_info.my_role, -1)
+        c["action"][i] = action
+        c["topic"][i] = TOPIC_CODES.get(topic, -1) if topic is not None else -1
+        c["target"][i] = target.agent_idx if target is not None and 0 <= target.agent_idx < 256 else 0
+        alive: np.ndarray = c["alive"][i]
+        alive.fill(False)
+        for agent in role.select(role.alive):
+            alive[agent.agent_idx] = True
+        claims: np.ndarray = c["claims"][i]
+        claims.fill(False)
+        for agent, claimed in role.talk_log.comingout_map.items():
+            if claimed in ROLE_CODES:
+                claims[agent.agent_idx, ROLE_CODES[claimed]] = True
+        np.minimum(self.reports, MAX_REPORTS, out=c["reports"][i], casting="unsafe")
+        self.count += 1
+
+
+def has_won(game_info: GameInfo) -> int:
+    """Return 1 if the side of my role won the finished game, 0 if it lost, and -1 if the roles are unknown."""
+    roles: Dict[Agent, Role] = game_info.role_map
+    if len(roles) < len(game_info.agent_list):
+        return -1
+    werewolves_alive: bool = any(r == Role.WEREWOLF and game_info.status_map.get(a) == Status.ALIVE
+                                 for a, r in roles.items())
+    werewolf_side: bool = game_info.my_role in (Role.WEREWOLF, Role.POSSESSED)
+    return int(werewolves_alive == werewolf_side)
+
+
+class ExportingPlayer(AbstractPlayer):
+    """Player exporting every decision of the wrapped player, with the state of the game it was made in
+    and, once the game is over, its outcome."""
+    player: HyunjiPlayer # Wrapped player.
+    writer: ExportWriter # Writer of the rows.
+    rows: GameRows # Rows of the current game.
+    game: int # Number of the current game.
+    exporting: bool # Whether the current game is exported.
+
+    def __init__(self, player: HyunjiPlayer, writer: ExportWriter) -> None:
+        self.player = player
+        self.writer = writer
+        self.rows = GameRows()
+        self.game = 0
+        self.exporting = False
+
+    def record(self, action: int, target: Optional[Agent], topic: Optional[Topic] = None) -> None:
+        """Record the decision of the current role."""
+        if self.exporting:
+            self.rows.add(self.player.player, action, target, topic)
+
+    def attack(self) -> Agent:
+        agent: Agent = self.player.attack()
+        self.record(ATTACK, agent)
+        return agent
+
+    def day_start(self) -> None:
+        self.player.day_start()
+
+    def divine(self) -> Agent:
+        agent: Agent = self.player.divine()
+        self.record(DIVINE, agent)
+        return agent
+
+    def finish(self) -> None:
+        role: HyunjiVillager = self.player.player
+        # The outcome is read before the role forgets the game.
+        won: int = has_won(role.game_info)
+        self.player.finish()
+        if not self.exporting:
+            return
+        columns: Dict[str, np.ndarray] = self.rows.columns
+        columns["game"][:self.rows.count] = self.game
+        columns["won"][:self.rows.count] = won
+        self.writer.append(columns, self.rows.count)
+        self.rows.reset()
+
+    def guard(self) -> Agent:
+        agent: Agent = self.player.guard()
+        self.record(GUARD, agent)
+        return agent
+
+    def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
+        self.exporting = exportable(game_setting.player_num)
+        if not self.exporting:
+            logger.warning("games of %d players are not exported, the columns have room for %d",
+                           game_setting.player_num, MAX_AGENTS - 1)
+        self.game = self.writer.new_game()
+        self.rows.reset()
+        self.player.initialize(game_info, game_setting)
+
+    def talk(self) -> Content:
+        content: Content = self.player.talk()
+        self.record(TALK, getattr(content, "target", None), content.topic)
+        return content
+
+    def update(self, game_info: GameInfo) -> None:
+        self.player.update(game_info)
+
+    def vote(self) -> Agent:
+        agent: Agent = self.player.vote()
+        self.record(VOTE, agent)
+        return agent
+
+    def whisper(self) -> Content:
+        content: Content = self.player.whisper()
+        self.record(WHISPER, getattr(content, "target", None), content.topic)
+        return content
+
+
+def parts(directory: str) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield the columns written by each writer of an export, mapped into memory."""
+    for name in sorted(os.listdir(directory)):
+        path: str = os.path.join(directory, name)
+        if name.startswith("part-") and os.path.isdir(path):
+            yield {column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r") for column in COLUMNS}
+
+
+def load(directory: str) -> Dict[str, np.ndarray]:
+    """Return the columns of all rows of an export."""
+    loaded: List[Dict[str, np.ndarray]] = list(parts(directory))
+    if not loaded:
+        return new_columns(0)
+    return {column: np.concatenate([p[column] for p in loaded]) for column in COLUMNS}
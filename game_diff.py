@@ -0,0 +1,118 @@
+from typing import List, Optional, Sequence, Tuple
+
+from aiwolf import Agent, GameInfo, Judge, Status, Talk, Whisper
+
+from agent_mask import mask_of
+
+# Key of a result: the day of the snapshot and the agent index of its target.
+ResultKey = Optional[Tuple[int, int]]
+
+
+class GameDelta:
+    """What changed between two successive game information snapshots."""
+    __slots__ = ("day", "new_day", "talk_start", "talks", "whisper_start", "whispers", "alive", "died",
+                 "divine_result", "medium_result", "executed_agent", "attacked_agent", "guarded_agent", "last_dead")
+    day: int # Day of the snapshot.
+    new_day: bool # Whether the snapshot begins a new day.
+    talk_start: int # Index of the first new talk of the day.
+    talks: Sequence[Talk] # New talks.
+    whisper_start: int # Index of the first new whisper of the day.
+    whispers: Sequence[Whisper] # New whispers.
+    alive: int # Bitmask of alive agents.
+    died: int # Bitmask of agents died since the previous snapshot.
+    divine_result: Optional[Judge] # New divination result.
+    medium_result: Optional[Judge] # New identification result.
+    executed_agent: Optional[Agent] # Newly executed agent.
+    attacked_agent: Optional[Agent] # Newly attacked agent.
+    guarded_agent: Optional[Agent] # Newly guarded agent.
+    last_dead: List[Agent] # Agents died last night, on a new day.
+
+    def __init__(self, day: int, alive: int) -> None:
+        self.day = day
+        self.new_day = False
+        self.talk_start = 0
+        self.talks = ()
+        self.whisper_start = 0
+        self.whispers = ()
+        self.alive = alive
+        self.died = 0
+        self.divine_result = None
+        self.medium_result = None
+        self.executed_agent = None
+        self.attacked_agent = None
+        self.guarded_agent = None
+        self.last_dead = []
+
+
+def judge_key(day: int, judge: Optional[Judge]) -> ResultKey:
+    """Return the key of a divination or identification result."""
+    return (day, judge.target.agent_idx) if judge is not None else None
+
+
+def agent_key(day: int, agent: Optional[Agent]) -> ResultKey:
+    """Return the key of an executed, attacked or guarded agent."""
+    return (day, agent.agent_idx) if agent is not None and agent.agent_idx > 0 else None
+
+
+class GameDiff:
+    """Turns successive game information snapshots, which may be one object updated in place, into deltas.
+    Talks and whispers of a day are append-only, and statuses change only at executions and at dawn,
+    so a delta costs time in proportion to what changed rather than to the size of the game."""
+    __slots__ = ("day", "talk_head", "whisper_head", "alive", "execution", "results")
+    day: int # Day of the previous snapshot.
+    talk_head: int # Number of talks of the day seen so far.
+    whisper_head: int # Number of whispers of the day seen so far.
+    alive: int # Bitmask of alive agents in the previous snapshot.
+    execution: Tuple[ResultKey, ResultKey] # Keys of the executed and the latest executed agents.
+    results: List[ResultKey] # Keys of the divination, identification, execution, attack and guard seen last.
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the previous game."""
+        self.day = -1
+        self.talk_head = 0
+        self.whisper_head = 0
+        self.alive = 0
+        self.execution = (None, None)
+        self.results = [None] * 5
+
+    def diff(self, game_info: GameInfo) -> GameDelta:
+        """Return what changed since the previous snapshot."""
+        day: int = game_info.day
+        delta: GameDelta = GameDelta(day, self.alive)
+        if day != self.day:
+            delta.new_day = True
+            self.day = day
+            self.talk_head = 0
+            self.whisper_head = 0
+        delta.talk_start = self.talk_head
+        if len(game_info.talk_list) > self.talk_head:
+            delta.talks = game_info.talk_list[self.talk_head:]
+            self.talk_head = len(game_info.talk_list)
+        delta.whisper_start = self.whisper_head
+        if len(game_info.whisper_list) > self.whisper_head:
+            delta.whispers = game_info.whisper_list[self.whisper_head:]
+            self.whisper_head = len(game_info.whisper_list)
+        execution: Tuple[ResultKey, ResultKey] = (agent_key(day, game_info.executed_agent),
+                                                  agent_key(day, game_info.latest_executed_agent))
+        if delta.new_day or execution != self.execution:
+            self.execution = execution
+            alive: int = mask_of(a for a, s in game_info.status_map.items() if s == Status.ALIVE)
+            delta.died = self.alive & ~alive
+            delta.alive = self.alive = alive
+        if delta.new_day:
+            delta.last_dead = list(game_info.last_dead_agent_list)
+        keys: List[ResultKey] = [judge_key(day, game_info.divine_result), judge_key(day, game_info.medium_result),
+                                 execution[0], agent_key(day, game_info.attacked_agent),
+                                 agent_key(day, game_info.guarded_agent)]
+        if keys != self.results:
+            new: List[bool] = [k is not None and k != r for k, r in zip(keys, self.results)]
+            self.results = keys
+            delta.divine_result = game_info.divine_result if new[0] else None
+            delta.medium_result = game_info.medium_result if new[1] else None
+            delta.executed_agent = game_info.executed_agent if new[2] else None
+            delta.attacked_agent = game_info.attacked_agent if new[3] else None
+            delta.guarded_agent = game_info.guarded_agent if new[4] else None
+        return delta
@@ -1,30 +1,52 @@
+import importlib
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
 from aiwolf import AbstractPlayer, Agent, Content, GameInfo, GameSetting, Role
 
-from bodyguard import HyunjiBodyguard
-from medium import HyunjiMedium
-from possessed import HyunjiPossessed
-from seer import HyunjiSeer
-from villager import HyunjiVillager
-from werewolf import HyunjiWerewolf
+if TYPE_CHECKING:
+    from villager import HyunjiVillager
+
+# Module and class of the strategy of each role, imported when the role is first played.
+ROLE_CLASSES: Dict[Role, Tuple[str, str]] = {
+    Role.VILLAGER: ("villager", "HyunjiVillager"),
+    Role.BODYGUARD: ("bodyguard", "HyunjiBodyguard"),
+    Role.MEDIUM: ("medium", "HyunjiMedium"),
+    Role.SEER: ("seer", "HyunjiSeer"),
+    Role.POSSESSED: ("possessed", "HyunjiPossessed"),
+    Role.WEREWOLF: ("werewolf", "HyunjiWerewolf"),
+}
+
+
+def preload() -> None:
+    """Import the modules of all roles, so that no game has to wait for them."""
+    for module, _ in ROLE_CLASSES.values():
+        importlib.import_module(module)
 
 
 class HyunjiPlayer(AbstractPlayer):
-    villager: AbstractPlayer
-    bodyguard: AbstractPlayer
-    medium: AbstractPlayer
-    seer: AbstractPlayer
-    possessed: AbstractPlayer
-    werewolf: AbstractPlayer
-    player: AbstractPlayer
-
-    def __init__(self) -> None:
-        self.villager = HyunjiVillager()
-        self.bodyguard = HyunjiBodyguard()
-        self.medium = HyunjiMedium()
-        self.seer = HyunjiSeer()
-        self.possessed = HyunjiPossessed()
-        self.werewolf = HyunjiWerewolf()
-        self.player = self.villager
+    roles: Dict[Role, "HyunjiVillager"] # Strategies of the roles played so far, reused across games.
+    seed: Optional[int] # Seed of the random number generators of the roles.
+    player: "HyunjiVillager" # Strategy of the role of the current game.
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.roles = {}
+        self.seed = seed
+        self.player = None  # type: ignore
+
+    def get_role(self, role: Role) -> "HyunjiVillager":
+        """Return the strategy of the role, creating it the first time the role is played.
+        Roles outside the standard ones are played as villagers."""
+        strategy: Optional["HyunjiVillager"] = self.roles.get(role)
+        if strategy is None:
+            module, name = ROLE_CLASSES.get(role, ROLE_CLASSES[Role.VILLAGER])
+            strategy = self.roles[role] = getattr(importlib.import_module(module), name)(self.seed)
+        return strategy
+
+    def reseed(self, seed: Optional[int]) -> None:
+        """Restart the random number generators of all roles from the seed."""
+        self.seed = seed
+        for role in self.roles.values():
+            role.reseed(seed)
 
     def attack(self) -> Agent:
         return self.player.attack()
@@ -42,19 +64,7 @@ class HyunjiPlayer(AbstractPlayer):
         return self.player.guard()
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
-        role: Role = game_info.my_role
-        if role == Role.VILLAGER:
-            self.player = self.villager
-        elif role == Role.BODYGUARD:
-            self.player = self.bodyguard
-        elif role == Role.MEDIUM:
-            self.player = self.medium
-        elif role == Role.SEER:
-            self.player = self.seer
-        elif role == Role.POSSESSED:
-            self.player = self.possessed
-        elif role == Role.WEREWOLF:
-            self.player = self.werewolf
+        self.player = self.get_role(game_info.my_role)
         self.player.initialize(game_info, game_setting)
 
     def talk(self) -> Content:
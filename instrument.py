@@ -0,0 +1,200 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+from aiwolf import AbstractPlayer, Agent, Content, GameInfo, GameSetting, Role
+
+from talk_log import game_key
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Number of histogram buckets. Bucket i counts calls taking less than 2^i microseconds.
+NUM_BUCKETS: int = 32
+# Fraction of the time limit above which a call is warned about.
+WARN_RATIO: float = 0.8
+
+T = TypeVar("T")
+
+
+class Histogram:
+    """Log-scale histogram of call latencies."""
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+    buckets: List[int] # Number of calls in each bucket.
+    count: int # Number of recorded calls.
+    total_ns: int # Sum of the recorded latencies in nanoseconds.
+    max_ns: int # Largest recorded latency in nanoseconds.
+
+    def __init__(self) -> None:
+        self.buckets = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, elapsed_ns: int) -> None:
+        """Record a call that took the given time."""
+        self.buckets[min((elapsed_ns // 1000).bit_length(), NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def percentile(self, p: float) -> int:
+        """Return the upper bound in microseconds of the bucket containing the given percentile,
+        or the largest latency if it is smaller."""
+        rank: float = self.count * p
+        seen: int = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(1 << i, -(-self.max_ns // 1000))
+        return 0
+
+
+def latency_table(histograms: Dict[Tuple[str, str], Histogram]) -> str:
+    """Return the table of the latencies of the histograms, by role and method name."""
+    lines: List[str] = [f"{'role':<10} {'method':<11} {'calls':>7} {'mean us':>9} {'p50 us':>8} "
+                        f"{'p99 us':>8} {'max us':>9}"]
+    for (role, method), h in sorted(histograms.items()):
+        lines.append(f"{role:<10} {method:<11} {h.count:>7} {h.total_ns / h.count / 1000:>9.1f} "
+                     f"{h.percentile(0.5):>8} {h.percentile(0.99):>8} {h.max_ns / 1000:>9.1f}")
+    return "\n".join(lines)
+
+
+class LatencyRecorder:
+    """Per-role, per-method latency histograms of the callbacks of players, reported for every game once its last
+    agent of the process has finished it, and for all games when the process exits.
+    Only one in every sample_interval calls is timed, so it can be left on in production."""
+    sample_interval: int # Time one in this many calls.
+    histograms: Dict[Tuple[str, str], Histogram] # Histograms of all games by role and method name.
+    game_histograms: Dict[Hashable, Dict[Tuple[str, str], Histogram]] # Histograms of the games being played, by key.
+    players: Dict[Hashable, int] # Agents of the process still playing each game, by game key.
+    games: int # Games finished by the agents of the process, each counted once.
+    calls: int # Number of calls seen, used for sampling.
+    time_limit_ns: Optional[int] # Time limit of a request in nanoseconds, if known.
+    lock: threading.Lock # Lock of the counters and histograms, updated by agents on several threads.
+
+    def __init__(self, sample_interval: int = 1) -> None:
+        self.sample_interval = max(sample_interval, 1)
+        self.histograms = {}
+        self.game_histograms = {}
+        self.players = {}
+        self.games = 0
+        self.calls = 0
+        self.time_limit_ns = None
+        self.lock = threading.Lock()
+        atexit.register(self.report)
+
+    def set_time_limit(self, game_setting: GameSetting) -> None:
+        """Take the time limit of requests from the game setting."""
+        time_limit: int = getattr(game_setting, "time_limit", 0) or 0
+        self.time_limit_ns = time_limit * 1_000_000 if time_limit > 0 else None
+
+    def game_started(self, key: Hashable) -> None:
+        """Note that an agent of the process has started playing the game."""
+        with self.lock:
+            self.players[key] = self.players.get(key, 0) + 1
+            self.game_histograms.setdefault(key, {})
+
+    def game_finished(self, key: Hashable) -> None:
+        """Report the latencies of the game once its last agent of the process has finished it."""
+        with self.lock:
+            left: int = self.players.get(key, 1) - 1
+            if left > 0:
+                self.players[key] = left
+                return
+            self.players.pop(key, None)
+            histograms: Dict[Tuple[str, str], Histogram] = self.game_histograms.pop(key, {})
+            self.games += 1
+            game: int = self.games
+        if histograms:
+            logger.info("callback latencies of game %d (1 in %d calls sampled)\n%s",
+                        game, self.sample_interval, latency_table(histograms))
+
+    def call(self, key: Optional[Hashable], role: str, method: str, func: Callable[..., T], *args) -> T:
+        """Call the function for the game with the given key, timing it if it is sampled."""
+        with self.lock:
+            self.calls += 1
+            sampled: bool = self.calls % self.sample_interval == 0
+        if not sampled:
+            return func(*args)
+        start: int = time.perf_counter_ns()
+        result: T = func(*args)
+        elapsed: int = time.perf_counter_ns() - start
+        name: Tuple[str, str] = (role, method)
+        with self.lock:
+            for histograms in (self.histograms, self.game_histograms.get(key)):
+                if histograms is None:
+                    continue
+                histogram: Optional[Histogram] = histograms.get(name)
+                if histogram is None:
+                    histogram = histograms[name] = Histogram()
+                histogram.add(elapsed)
+        if self.time_limit_ns is not None and elapsed > self.time_limit_ns * WARN_RATIO:
+            logger.warning("%s.%s took %.1f ms of the %.0f ms time limit",
+                           role, method, elapsed / 1e6, self.time_limit_ns / 1e6)
+        return result
+
+    def report(self) -> None:
+        """Log the aggregate latencies recorded so far."""
+        with self.lock:
+            if not self.histograms:
+                return
+            table: str = latency_table(self.histograms)
+            games: int = self.games
+        logger.info("callback latencies of %d games (1 in %d calls sampled)\n%s", games, self.sample_interval, table)
+
+
+class InstrumentedPlayer(AbstractPlayer):
+    """Player recording the latencies of every callback of the wrapped player."""
+    player: AbstractPlayer # Wrapped player.
+    recorder: LatencyRecorder # Recorder of the latencies.
+    role: str # Role of the current game.
+    key: Optional[Hashable] # Key of the current game, while it is played.
+
+    def __init__(self, player: AbstractPlayer, recorder: LatencyRecorder) -> None:
+        self.player = player
+        self.recorder = recorder
+        self.role = "none"
+        self.key = None
+
+    def attack(self) -> Agent:
+        return self.recorder.call(self.key, self.role, "attack", self.player.attack)
+
+    def day_start(self) -> None:
+        self.recorder.call(self.key, self.role, "day_start", self.player.day_start)
+
+    def divine(self) -> Agent:
+        return self.recorder.call(self.key, self.role, "divine", self.player.divine)
+
+    def finish(self) -> None:
+        self.recorder.call(self.key, self.role, "finish", self.player.finish)
+        if self.key is not None:
+            self.recorder.game_finished(self.key)
+            self.key = None
+
+    def guard(self) -> Agent:
+        return self.recorder.call(self.key, self.role, "guard", self.player.guard)
+
+    def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
+        role: Optional[Role] = game_info.my_role
+        self.role = role.name if role is not None else "none"
+        self.recorder.set_time_limit(game_setting)
+        if self.key is not None:  # The previous game was cut short.
+            self.recorder.game_finished(self.key)
+        self.key = game_key(game_info, game_setting)
+        self.recorder.game_started(self.key)
+        self.recorder.call(self.key, self.role, "initialize", self.player.initialize, game_info, game_setting)
+
+    def talk(self) -> Content:
+        return self.recorder.call(self.key, self.role, "talk", self.player.talk)
+
+    def update(self, game_info: GameInfo) -> None:
+        self.recorder.call(self.key, self.role, "update", self.player.update, game_info)
+
+    def vote(self) -> Agent:
+        return self.recorder.call(self.key, self.role, "vote", self.player.vote)
+
+    def whisper(self) -> Content:
+        return self.recorder.call(self.key, self.role, "whisper", self.player.whisper)
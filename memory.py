@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+import tracemalloc
+from typing import Dict, Hashable, List, Optional
+
+from aiwolf import AbstractPlayer, Agent, Content, GameInfo, GameSetting
+
+from talk_log import game_key
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Frames kept of each traced allocation. One is enough to tell the line, and keeps tracing cheap.
+TRACE_FRAMES: int = 1
+# Lines shown in a report of the allocation growth.
+TOP_LINES: int = 10
+
+
+def resident_kb(pid: Optional[int] = None) -> int:
+    """Return the resident memory of the process in kilobytes, or 0 where /proc is not available."""
+    try:
+        with open(f"/proc/{pid or os.getpid()}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class MemoryTracker:
+    """Traces the allocations of the process and reports how they grow over the games.
+    Every report gives the growth of traced memory and resident memory per game since the previous one,
+    and the source lines whose allocations grew the most."""
+    interval: int # Games between two reports.
+    games: int # Games finished by the agents of the process, each counted once.
+    players: Dict[Hashable, int] # Agents of the process still playing each game, by game key.
+    traced: int # Traced memory at the previous report, in bytes.
+    resident: int # Resident memory at the previous report, in kilobytes.
+    snapshot: Optional[tracemalloc.Snapshot] # Snapshot at the previous report.
+    growth: List[float] # Traced bytes per game over each interval so far.
+    lock: threading.Lock # Lock of the counters, updated by agents on several threads.
+
+    def __init__(self, interval: int = 100) -> None:
+        self.interval = interval
+        self.games = 0
+        self.players = {}
+        self.traced = 0
+        self.resident = 0
+        self.snapshot = None
+        self.growth = []
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        """Begin tracing allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        self.traced = tracemalloc.get_traced_memory()[0]
+        self.resident = resident_kb()
+        self.snapshot = tracemalloc.take_snapshot()
+
+    def game_started(self, key: Hashable) -> None:
+        """Note that an agent of the process has started playing the game."""
+        with self.lock:
+            self.players[key] = self.players.get(key, 0) + 1
+
+    def game_finished(self, key: Optional[Hashable] = None) -> None:
+        """Count a finished game once its last agent of the process has finished it,
+        or at once if no key is given, reporting the growth every interval games."""
+        with self.lock:
+            if key is not None:
+                left: int = self.players.get(key, 1) - 1
+                if left > 0:
+                    self.players[key] = left
+                    return
+                self.players.pop(key, None)
+            self.games += 1
+            if self.games % self.interval == 0:
+                self.report()
+
+    def report(self) -> None:
+        """Log the growth since the previous report."""
+        if not tracemalloc.is_tracing():
+            return
+        traced: int = tracemalloc.get_traced_memory()[0]
+        resident: int = resident_kb()
+        snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+        per_game: float = (traced - self.traced) / self.interval
+        self.growth.append(per_game)
+        resident_per_game: float = (resident - self.resident) / self.interval
+        lines: List[str] = [f"{self.games} games: traced {traced / 1024:.0f} KiB ({per_game:+.0f} B/game), "
+                            f"resident {resident / 1024:.1f} MiB ({resident_per_game:+.1f} KiB/game)"]
+        if self.snapshot is not None:
+            for stat in snapshot.compare_to(self.snapshot, "lineno")[:TOP_LINES]:
+                lines.append(f"  {stat.size_diff / 1024:>+9.1f} KiB {stat.count_diff:>+7} blocks  {stat.traceback}")
+        logger.info("\n".join(lines))
+        self.traced = traced
+        self.resident = resident
+        self.snapshot = snapshot
+
+
+class TrackedPlayer(AbstractPlayer):
+    """Player counting the finished games of the wrapped player for a memory tracker,
+    together with the other tracked players of the process sitting in the same games."""
+    player: AbstractPlayer # Wrapped player.
+    tracker: MemoryTracker # Tracker of the process.
+    key: Optional[Hashable] # Key of the current game, while it is played.
+
+    def __init__(self, player: AbstractPlayer, tracker: MemoryTracker) -> None:
+        self.player = player
+        self.tracker = tracker
+        self.key = None
+
+    def attack(self) -> Agent:
+        return self.player.attack()
+
+    def day_start(self) -> None:
+        self.player.day_start()
+
+    def divine(self) -> Agent:
+        return self.player.divine()
+
+    def finish(self) -> None:
+        self.player.finish()
+        if self.key is not None:
+            self.tracker.game_finished(self.key)
+            self.key = None
+
+    def guard(self) -> Agent:
+        return self.player.guard()
+
+    def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
+        if self.key is not None:  # The previous game was cut short.
+            self.tracker.game_finished(self.key)
+        self.key = game_key(game_info, game_setting)
+        self.tracker.game_started(self.key)
+        self.player.initialize(game_info, game_setting)
+
+    def talk(self) -> Content:
+        return self.player.talk()
+
+    def update(self, game_info: GameInfo) -> None:
+        self.player.update(game_info)
+
+    def vote(self) -> Agent:
+        return self.player.vote()
+
+    def whisper(self) -> Content:
+        return self.player.whisper()
@@ -0,0 +1,189 @@
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, NamedTuple, Optional, Sequence
+
+from aiwolf import Agent, GameInfo
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Magic number and version of the file format.
+MAGIC: bytes = b"HJOS"
+VERSION: int = 1
+# Number of opponents kept by default. The least recently seen ones are evicted beyond it.
+DEFAULT_CAPACITY: int = 4096
+# Header: magic, version, capacity and the clock counting updates.
+HEADER: struct.Struct = struct.Struct("<4sIIQ")
+# Record: name, time of the last update, and the counts of OpponentStats.
+RECORD: struct.Struct = struct.Struct("<32sQ9I")
+NAME_SIZE: int = 32
+
+
+class OpponentStats(NamedTuple):
+    """What has been seen of an opponent over past games."""
+    games: int = 0 # Number of games played.
+    werewolf_games: int = 0 # Games played as a werewolf.
+    possessed_games: int = 0 # Games played as a possessed.
+    seer_claims: int = 0 # Games in which it claimed to be a seer.
+    fake_seer_claims: int = 0 # Games in which it claimed to be a seer without being one.
+    co_day_total: int = 0 # Sum of the days of its first comingout.
+    comingouts: int = 0 # Games in which it did comingout.
+    votes: int = 0 # Votes cast.
+    werewolf_votes: int = 0 # Votes cast for werewolves.
+
+    @property
+    def werewolf_rate(self) -> float:
+        """Rate of games on the werewolf side, shrunk towards one in five while there are few games."""
+        return (self.werewolf_games + self.possessed_games + 1) / (self.games + 5)
+
+    @property
+    def fake_seer_rate(self) -> float:
+        """Rate of seer claims that were fake."""
+        return self.fake_seer_claims / self.seer_claims if self.seer_claims else 0.0
+
+    @property
+    def mean_co_day(self) -> float:
+        """Mean day of the first comingout, or -1 if it never did comingout."""
+        return self.co_day_total / self.comingouts if self.comingouts else -1.0
+
+    @property
+    def werewolf_vote_rate(self) -> float:
+        """Rate of votes cast for werewolves."""
+        return self.werewolf_votes / self.votes if self.votes else 0.0
+
+
+def player_names(game_info: GameInfo) -> Dict[Agent, str]:
+    """Return the names of the players of the agents reported at the start of the game, by agent.
+    The local engine and the stand-in server report them; the agent index is no name,
+    as seats are dealt anew every game, so agents without a reported name are not remembered."""
+    return getattr(game_info, "agent_name_map", None) or {}
+
+
+class OpponentStore:
+    """Statistics of opponents by name, in fixed-size records of a memory-mapped file.
+    The file is opened and indexed on first use, and holds at most capacity opponents,
+    evicting the least recently updated one. Without a path, the records are kept in memory.
+    The file is locked by the process using it; another process finding it locked keeps its records in memory."""
+    path: Optional[str] # Path of the file, or None to keep the records in memory.
+    capacity: int # Largest number of opponents.
+    fd: Optional[int] # Descriptor of the file, held open to keep it locked.
+    buffer: Optional[mmap.mmap] # Mapped file, once opened.
+    index: Dict[bytes, int] # Slot of each opponent by the name stored in its record.
+    free: int # First slot never used. Slots are used in order, so all the following ones are unused too.
+    clock: int # Number of updates, used as the time of the records.
+    lock: threading.Lock # Lock of the records, updated by agents on several threads.
+
+    def __init__(self, path: Optional[str] = None, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.path = path
+        self.capacity = capacity
+        self.fd = None
+        self.buffer = None
+        self.index = {}
+        self.free = 0
+        self.clock = 0
+        self.lock = threading.Lock()
+
+    def open(self) -> mmap.mmap:
+        """Map the file, creating it if needed, and index the names of its records."""
+        if self.buffer is not None:
+            return self.buffer
+        size: int = HEADER.size + RECORD.size * self.capacity
+        if self.path is not None:
+            fd: int = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                logger.warning("%s is used by another process, opponents are kept in memory", self.path)
+                self.path = None
+            else:
+                self.fd = fd
+        if self.path is None:
+            self.buffer = mmap.mmap(-1, size)
+            HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, self.capacity, 0)
+        else:
+            header: bytes = os.pread(fd, HEADER.size, 0)
+            magic, version = (HEADER.unpack(header)[:2] if len(header) == HEADER.size else (b"", 0))
+            if magic != MAGIC or version != VERSION:  # New or foreign file.
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, HEADER.pack(MAGIC, VERSION, self.capacity, 0), 0)
+            else:
+                self.capacity = HEADER.unpack(header)[2]
+                size = HEADER.size + RECORD.size * self.capacity
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+            self.buffer = mmap.mmap(fd, size)
+        self.clock = HEADER.unpack_from(self.buffer, 0)[3]
+        self.free = self.capacity
+        for slot in range(self.capacity):
+            offset: int = HEADER.size + RECORD.size * slot
+            name: bytes = self.buffer[offset:offset + NAME_SIZE].rstrip(b"\0")
+            if not name:
+                self.free = slot
+                break
+            self.index[name] = slot
+        return self.buffer
+
+    def get(self, name: str) -> OpponentStats:
+        """Return the statistics of the opponent, all zero if it has never been seen."""
+        with self.lock:
+            buffer: mmap.mmap = self.open()
+            slot: Optional[int] = self.index.get(name.encode()[:NAME_SIZE])
+            if slot is None:
+                return OpponentStats()
+            return OpponentStats(*RECORD.unpack_from(buffer, HEADER.size + RECORD.size * slot)[2:])
+
+    def update(self, name: str, counts: Sequence[int]) -> None:
+        """Add the counts, in the order of OpponentStats, to the statistics of the opponent."""
+        with self.lock:
+            buffer: mmap.mmap = self.open()
+            key: bytes = name.encode()[:NAME_SIZE]
+            slot: Optional[int] = self.index.get(key)
+            record: Sequence[int] = (0,) * len(OpponentStats._fields)
+            if slot is None:
+                slot = self.allocate()
+                self.index[key] = slot
+            else:
+                record = RECORD.unpack_from(buffer, HEADER.size + RECORD.size * slot)[2:]
+            self.clock += 1
+            RECORD.pack_into(buffer, HEADER.size + RECORD.size * slot, key, self.clock,
+                             *(a + b for a, b in zip(record, counts)))
+            HEADER.pack_into(buffer, 0, MAGIC, VERSION, self.capacity, self.clock)
+
+    def allocate(self) -> int:
+        """Return a slot for a new opponent, evicting the least recently updated one if all are used."""
+        if self.free < self.capacity:
+            self.free += 1
+            return self.free - 1
+        buffer: mmap.mmap = self.open()
+        slot: int = min(range(self.capacity),
+                        key=lambda s: struct.unpack_from("<Q", buffer, HEADER.size + RECORD.size * s + NAME_SIZE)[0])
+        offset: int = HEADER.size + RECORD.size * slot
+        del self.index[buffer[offset:offset + NAME_SIZE].rstrip(b"\0")]
+        return slot
+
+    def close(self) -> None:
+        """Write the records back, unmap the file and unlock it."""
+        with self.lock:
+            if self.buffer is not None:
+                self.buffer.flush()
+                self.buffer.close()
+                self.buffer = None
+                self.index.clear()
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+
+
+# Store shared by the agents of this process, if opponents are to be remembered across games.
+shared_store: Optional[OpponentStore] = None
+
+
+def use_store(path: Optional[str], capacity: int = DEFAULT_CAPACITY) -> None:
+    """Remember opponents across games in the file, or in memory if the path is None."""
+    global shared_store
+    shared_store = OpponentStore(path, capacity)
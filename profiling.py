@@ -0,0 +1,327 @@
+import cProfile
+import functools
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from collections import Counter, defaultdict
+from types import FrameType
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+
+from aiwolf import AbstractPlayer, Agent, Content, GameInfo, GameSetting, Role
+
+import anytime
+from talk_log import game_key
+
+T = TypeVar("T")
+
+# Seconds between two samples of the sampling profiler.
+SAMPLE_INTERVAL: float = 0.001
+# Deepest stack recorded by the sampling profiler.
+MAX_DEPTH: int = 64
+# Profiling modes.
+DETERMINISTIC: str = "cprofile"
+SAMPLING: str = "sample"
+
+# Suffix of the label of the background computations started by a callback.
+WORKER_SUFFIX: str = "_worker"
+
+# Games started by the profiled players of this process, counting a game once however many of them play it.
+game_numbers: Iterator[int] = itertools.count(1)
+# Number and players of this process of each game being played, by game key.
+games: Dict[Hashable, List[int]] = {}
+games_lock: threading.Lock = threading.Lock()
+
+
+def join_game(key: Hashable) -> int:
+    """Return the number of the game, numbering it if no other player of this process plays it."""
+    with games_lock:
+        entry: Optional[List[int]] = games.get(key)
+        if entry is None:
+            entry = games[key] = [next(game_numbers), 0]
+        entry[1] += 1
+        return entry[0]
+
+
+def leave_game(key: Hashable) -> None:
+    """Detach a player from the game, which is forgotten when no player of this process plays it any more."""
+    with games_lock:
+        entry: Optional[List[int]] = games.get(key)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del games[key]
+
+
+def frame_label(frame: FrameType) -> str:
+    """Return the label of the function of the frame in the profiles."""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+class Sampler:
+    """Samples the stacks of the threads running profiled callbacks, or computations started by them,
+    from a thread of its own. The thread sleeps while nothing is being profiled."""
+    running: Dict[int, Tuple[str, Counter]] # Callback and stack counts of each thread being sampled, by thread id.
+    lock: threading.Lock # Lock of the threads being sampled.
+    wake: threading.Event # Set while some thread is being sampled.
+    thread: Optional[threading.Thread] # Sampling thread, once started.
+
+    def __init__(self) -> None:
+        self.running = {}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+
+    def begin(self, callback: str, stacks: Counter) -> None:
+        """Begin sampling the current thread into the stack counts."""
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="sampler", daemon=True)
+                self.thread.start()
+            self.running[threading.get_ident()] = (callback, stacks)
+            self.wake.set()
+
+    def end(self) -> None:
+        """Stop sampling the current thread."""
+        with self.lock:
+            self.running.pop(threading.get_ident(), None)
+            if not self.running:
+                self.wake.clear()
+
+    def run(self) -> None:
+        """Take samples for ever."""
+        while True:
+            self.wake.wait()
+            frames: Dict[int, FrameType] = sys._current_frames()
+            with self.lock:
+                for ident, (callback, stacks) in self.running.items():
+                    frame: Optional[FrameType] = frames.get(ident)
+                    labels: List[str] = []
+                    # Frames above the callback belong to the client, and above a computation to the executor.
+                    while frame is not None and frame.f_code not in BOUNDARY_CODES and len(labels) < MAX_DEPTH:
+                        labels.append(frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(callback)
+                    stacks[";".join(reversed(labels))] += 1
+            time.sleep(SAMPLE_INTERVAL)
+
+
+sampler: Sampler = Sampler()
+
+
+class ProfileSettings(NamedTuple):
+    """Which games to profile, how, and where to dump the profiles."""
+    mode: str # DETERMINISTIC or SAMPLING.
+    directory: str # Directory of the profiles.
+    roles: Optional[FrozenSet[Role]] = None # Roles whose games are profiled, or None for all.
+    every: int = 1 # One in every this many games is profiled.
+
+
+class ProfiledPlayer(AbstractPlayer):
+    """Player profiling the callbacks of the wrapped player in selected games,
+    and dumping the profiles of each game under a directory when it finishes.
+    Background computations started by a profiled callback are profiled too, under the label of the callback
+    followed by WORKER_SUFFIX, so that the work it hands to the worker threads is not lost."""
+    player: AbstractPlayer # Wrapped player.
+    settings: ProfileSettings # Which games to profile, how, and where.
+    game: int # Number of the current game.
+    key: Optional[Hashable] # Key of the current game, while it is played.
+    seat: int # Agent index of the current game, telling apart the players of this process in the game.
+    role: str # Role of the current game.
+    profiles: Optional[Dict[str, cProfile.Profile]] # Deterministic profiles of each callback, if profiled.
+    task_profiles: List[Tuple[str, cProfile.Profile]] # Deterministic profiles of each computation, with its label.
+    stacks: Optional[Counter] # Sampled stacks, if profiled.
+
+    def __init__(self, player: AbstractPlayer, settings: ProfileSettings) -> None:
+        self.player = player
+        self.settings = settings
+        self.game = 0
+        self.key = None
+        self.seat = 0
+        self.role = "none"
+        self.profiles = None
+        self.task_profiles = []
+        self.stacks = None
+
+    def call(self, callback: str, func: Callable[..., T], *args) -> T:
+        """Call the callback, profiling it and the computations it starts if the game is profiled."""
+        if self.profiles is None and self.stacks is None:
+            return func(*args)
+        previous: Optional[Callable] = getattr(anytime.task_context, "wrap", None)
+        anytime.task_context.wrap = functools.partial(self.wrap_task, callback + WORKER_SUFFIX)
+        try:
+            if self.profiles is not None:
+                profile: Optional[cProfile.Profile] = self.profiles.get(callback)
+                if profile is None:
+                    profile = self.profiles[callback] = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:  # Python 3.12 and later profile one thread at a time, and another agent has it.
+                    return func(*args)
+                try:
+                    return func(*args)
+                finally:
+                    profile.disable()
+            sampler.begin(callback, self.stacks)  # type: ignore
+            try:
+                return func(*args)
+            finally:
+                sampler.end()
+        finally:
+            anytime.task_context.wrap = previous
+
+    def wrap_task(self, label: str, func: Callable[..., T]) -> Callable[..., T]:
+        """Return the computation profiled into the profiles of the current game under the label."""
+        return functools.partial(self.run_task, label, self.task_profiles, self.stacks, func)
+
+    def run_task(self, label: str, task_profiles: List[Tuple[str, cProfile.Profile]], stacks: Optional[Counter],
+                 func: Callable[..., T], *args) -> T:
+        """Run a computation on a worker thread, adding its profile to those of the game that started it.
+        Each computation gets a profile of its own, as a profile follows one thread at a time."""
+        if stacks is not None:
+            sampler.begin(label, stacks)
+            try:
+                return func(*args)
+            finally:
+                sampler.end()
+        profile: cProfile.Profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Python 3.12 and later profile all threads at once, and a callback is being profiled.
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            task_profiles.append((label, profile))
+
+    def dump(self) -> None:
+        """Write the profiles of the game and forget them. Computations still running are left out."""
+        os.makedirs(self.settings.directory, exist_ok=True)
+        prefix: str = os.path.join(self.settings.directory,
+                                   f"{os.getpid()}-{self.game:06d}-{self.seat:02d}-{self.role}")
+        if self.profiles is not None:
+            for callback, profile in self.profiles.items():
+                profile.dump_stats(f"{prefix}.{callback}.prof")
+            merged: Dict[str, pstats.Stats] = {}
+            for label, profile in list(self.task_profiles):
+                if label in merged:
+                    merged[label].add(profile)
+                else:
+                    merged[label] = pstats.Stats(profile)
+            for label, stats in merged.items():
+                stats.dump_stats(f"{prefix}.{label}.prof")
+        if self.stacks is not None:
+            with sampler.lock:  # Computations may still be sampled.
+                stacks: List[Tuple[str, int]] = list(self.stacks.items())
+            with open(f"{prefix}.folded", "w") as f:
+                for stack, n in stacks:
+                    f.write(f"{stack} {n}\n")
+        self.profiles = None
+        self.task_profiles = []
+        self.stacks = None
+
+    def attack(self) -> Agent:
+        return self.call("attack", self.player.attack)
+
+    def day_start(self) -> None:
+        self.call("day_start", self.player.day_start)
+
+    def divine(self) -> Agent:
+        return self.call("divine", self.player.divine)
+
+    def finish(self) -> None:
+        self.call("finish", self.player.finish)
+        if self.profiles is not None or self.stacks is not None:
+            self.dump()
+        if self.key is not None:
+            leave_game(self.key)
+            self.key = None
+
+    def guard(self) -> Agent:
+        return self.call("guard", self.player.guard)
+
+    def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
+        role: Optional[Role] = game_info.my_role
+        self.role = role.name if role is not None else "none"
+        self.seat = game_info.me.agent_idx
+        if self.key is not None:  # The previous game was cut short.
+            leave_game(self.key)
+        self.key = game_key(game_info, game_setting)
+        self.game = join_game(self.key)
+        self.profiles = None
+        self.task_profiles = []
+        self.stacks = None
+        settings: ProfileSettings = self.settings
+        if (settings.roles is None or role in settings.roles) and self.game % settings.every == 0:
+            if settings.mode == DETERMINISTIC:
+                self.profiles = {}
+            else:
+                self.stacks = Counter()
+        self.call("initialize", self.player.initialize, game_info, game_setting)
+
+    def talk(self) -> Content:
+        return self.call("talk", self.player.talk)
+
+    def update(self, game_info: GameInfo) -> None:
+        self.call("update", self.player.update, game_info)
+
+    def vote(self) -> Agent:
+        return self.call("vote", self.player.vote)
+
+    def whisper(self) -> Content:
+        return self.call("whisper", self.player.whisper)
+
+
+# Code of the frames below which the sampled stacks belong to the agent.
+BOUNDARY_CODES: Tuple[Any, ...] = (ProfiledPlayer.call.__code__, ProfiledPlayer.run_task.__code__)
+
+
+def callback_of(file_name: str) -> str:
+    """Return the callback a profile file belongs to."""
+    return file_name.rsplit(".", 2)[-2]
+
+
+def summarize(directory: str, top: int = 10) -> str:
+    """Merge the profiles in the directory and return the hottest functions of each callback by own time,
+    in seconds for deterministic profiles and in samples for sampled ones."""
+    merged: Dict[str, pstats.Stats] = {}
+    samples: Dict[str, Counter] = defaultdict(Counter)
+    for name in sorted(os.listdir(directory)):
+        path: str = os.path.join(directory, name)
+        if name.endswith(".prof"):
+            callback: str = callback_of(name)
+            if callback in merged:
+                merged[callback].add(path)
+            else:
+                merged[callback] = pstats.Stats(path)
+        elif name.endswith(".folded"):
+            with open(path) as f:
+                for line in f:
+                    stack, n = line.rsplit(" ", 1)
+                    frames: List[str] = stack.split(";")
+                    samples[frames[0]][frames[-1]] += int(n)
+    lines: List[str] = []
+    for callback, stats in sorted(merged.items()):
+        entries = sorted(stats.stats.items(), key=lambda e: e[1][2], reverse=True)  # type: ignore
+        lines.append(f"{callback} ({stats.total_tt:.3f}s)")  # type: ignore
+        for (file, line, func), (_, calls, own, cumulative, _) in entries[:top]:
+            lines.append(f"  {own:>9.4f}s own {cumulative:>9.4f}s cum {calls:>9} calls  "
+                         f"{os.path.basename(file)}:{line}({func})")
+    for callback, counts in sorted(samples.items()):
+        lines.append(f"{callback} ({sum(counts.values())} samples)")
+        for label, n in counts.most_common(top):
+            lines.append(f"  {n:>9} samples  {label}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument("directory", help="directory of the profiles")
+    parser.add_argument("-t", type=int, action="store", dest="top", default=10, help="functions shown per callback")
+    input_args = parser.parse_args()
+    print(summarize(input_args.directory, input_args.top))
@@ -0,0 +1,222 @@
+import mmap
+import os
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from aiwolf import AbstractPlayer, Role, Species
+
+from engine import GameEngine, LocalSeat
+
+# Number of splits of the fields after the day and the kind, so that texts keep their commas.
+MAX_SPLITS: Dict[str, int] = {"talk": 3, "whisper": 3}
+# Events of the night, after the talks of the day.
+NIGHT_EVENTS: frozenset = frozenset({"vote", "execute", "divine", "guard", "attackVote", "attack"})
+# Winning side of the team named in the result line, which is the team of the villagers or of the werewolves.
+WINNERS: Dict[str, Species] = {"VILLAGER": Species.HUMAN, "HUMAN": Species.HUMAN, "WEREWOLF": Species.WEREWOLF}
+
+
+class LogEvent(NamedTuple):
+    """One line of an AIWolf server game log."""
+    day: int # Day of the event.
+    kind: str # Kind of the event, such as status, talk, vote or attack.
+    fields: Tuple[str, ...] # Remaining fields of the line.
+
+
+class Decision(NamedTuple):
+    """What the agent decided where the logged agent acted."""
+    day: int # Day of the decision.
+    request: str # Request the agent answered.
+    logged: str # Action in the log.
+    decided: str # Action of the agent.
+
+
+def log_files(paths: Iterable[str]) -> Iterator[str]:
+    """Yield the log files in the given files and directories, in order of path."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(".log"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def read_log(path: str) -> Iterator[LogEvent]:
+    """Yield the events of a log file, reading it through a memory map."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                text: str = line.decode().rstrip("\r\n")
+                if not text:
+                    continue
+                day, kind, rest = text.split(",", 2)
+                yield LogEvent(int(day), kind, tuple(rest.split(",", MAX_SPLITS.get(kind, -1))))
+
+
+class Replay(GameEngine):
+    """Replays a logged game to the agent sitting on one of its seats.
+    The game information is rebuilt event by event,
+    and wherever the logged agent acted, the agent is asked for its own action instead."""
+    seat: int # Agent index of the replayed seat.
+    events: Iterator[LogEvent] # Events of the log.
+    pending: List[LogEvent] # Events read ahead while looking for the roles.
+    day_started: bool # Whether DAILY_INITIALIZE of the current day has been sent.
+    night: bool # Whether the night of the current day has begun.
+
+    def __init__(self, player: AbstractPlayer, seat: int, events: Iterable[LogEvent]) -> None:
+        self.events = iter(events)
+        self.pending = []
+        # The status lines of day 0 come first and tell the roles.
+        roles: Dict[int, Role] = {}
+        for event in self.events:
+            if event.kind != "status":
+                self.pending.append(event)
+                break
+            roles[int(event.fields[0])] = Role[event.fields[1]]
+        if seat not in roles:
+            raise ValueError(f"No agent {seat} in the log.")
+        super().__init__([LocalSeat(player) if i == seat else None for i in sorted(roles)],
+                         dict(Counter(roles.values())))
+        self.roles = roles
+        self.seat = seat
+        self.day_started = False
+        self.night = False
+
+    def begin_day(self, day: int) -> None:
+        """Begin a new day. DAILY_INITIALIZE is sent once the status of all agents is known."""
+        self.day = day
+        self.talks = []
+        self.whispers = []
+        self.talk_heads = [0] * len(self.seats)
+        self.whisper_heads = [0] * len(self.seats)
+        self.day_started = False
+        self.night = False
+
+    def begin_night(self) -> None:
+        """End the talks of the day and clear the results of the previous night."""
+        self.send(self.seat, "DAILY_FINISH")
+        self.night = True
+        self.executed = -1
+        self.medium_result = None
+        self.divine_result = None
+        self.guarded = -1
+        self.attacked = -1
+        self.last_dead = []
+
+    def ask(self, request: str, logged: str, with_info: bool = True) -> Decision:
+        """Ask the agent for its action where the logged agent did the given one."""
+        decided: Any = self.send(self.seat, request, with_info)
+        return Decision(self.day, request, logged, str(decided))
+
+    def decisions(self) -> Iterator[Decision]:
+        """Replay the game, yielding the decisions of the agent."""
+        self.seats[self.seat - 1].request({"request": "INITIALIZE", "gameInfo": self.game_info_packet(self.seat),
+                                           "gameSetting": self.setting})
+        votes: List[Dict[str, int]] = []
+        for event in self.chain():
+            f: Tuple[str, ...] = event.fields
+            if event.kind == "status":
+                if event.day != self.day:
+                    self.begin_day(event.day)
+                self.alive[int(f[0])] = f[2] == "ALIVE"
+                continue
+            if event.kind == "result":
+                self.winner = WINNERS.get(f[-1])
+                continue
+            if not self.day_started:
+                self.day_started = True
+                self.send(self.seat, "DAILY_INITIALIZE")
+            if event.kind in ("talk", "whisper"):
+                agent: int = int(f[2])
+                if agent == self.seat:
+                    yield self.ask(event.kind.upper(), f[3], with_info=False)
+                (self.talks if event.kind == "talk" else self.whispers).append(
+                    {"agent": agent, "day": event.day, "idx": int(f[0]), "turn": int(f[1]), "text": f[3]})
+                continue
+            if event.kind not in NIGHT_EVENTS:
+                continue
+            if not self.night:
+                self.begin_night()
+            if event.kind in ("vote", "attackVote"):
+                voter, target = int(f[0]), int(f[1])
+                if any(v["agent"] == voter for v in votes):  # A revote.
+                    votes = []
+                if voter == self.seat:
+                    yield self.ask("VOTE" if event.kind == "vote" else "ATTACK", f[1])
+                votes.append({"agent": voter, "day": event.day, "target": target})
+                if event.kind == "vote":
+                    self.vote_list = votes
+                else:
+                    self.attack_vote_list = votes
+                continue
+            votes = []
+            if event.kind == "execute":
+                self.executed = int(f[0])
+                result: str = "WEREWOLF" if self.roles[self.executed] == Role.WEREWOLF else "HUMAN"
+                self.medium_result = {"agent": self.seat, "day": event.day, "target": self.executed, "result": result}
+            elif event.kind == "divine":
+                if int(f[0]) == self.seat:
+                    yield self.ask("DIVINE", f[1])
+                self.divine_result = {"agent": int(f[0]), "day": event.day, "target": int(f[1]), "result": f[2]}
+            elif event.kind == "guard":
+                if int(f[0]) == self.seat:
+                    yield self.ask("GUARD", f[1])
+                self.guarded = int(f[1])
+            elif event.kind == "attack":
+                self.attacked = int(f[0])
+                if f[1] == "true":
+                    self.last_dead = [self.attacked]
+        self.seats[self.seat - 1].request({"request": "FINISH", "gameInfo": self.game_info_packet(self.seat, True)})
+
+    def chain(self) -> Iterator[LogEvent]:
+        """Yield the events read ahead, then the rest."""
+        yield from self.pending
+        yield from self.events
+
+
+def replay(paths: Iterable[str], player: AbstractPlayer, seat: Optional[int] = None,
+           role: Optional[Role] = None) -> Iterator[Decision]:
+    """Replay the logs to the player from the given seat, or from the seats having the given role,
+    yielding its decisions. Without either, every seat is replayed."""
+    for path in log_files(paths):
+        if seat is not None:
+            seats: List[int] = [seat]
+        else:
+            statuses: Iterator[LogEvent] = read_log(path)
+            seats = []
+            for event in statuses:
+                if event.kind != "status":
+                    break
+                if role is None or event.fields[1] == role.name:
+                    seats.append(int(event.fields[0]))
+            statuses.close()
+        for s in seats:
+            yield from Replay(player, s, read_log(path)).decisions()
+
+
+if __name__ == "__main__":
+    from hyunji_agent import HyunjiPlayer
+
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument("paths", nargs="+", help="log files or directories of them")
+    parser.add_argument("-a", type=int, action="store", dest="seat", help="agent index of the replayed seat")
+    parser.add_argument("-r", type=str, action="store", dest="role", help="replay the seats having this role")
+    input_args = parser.parse_args()
+    agreed: Counter = Counter()
+    total: Counter = Counter()
+    start: float = time.perf_counter()
+    for decision in replay(input_args.paths, HyunjiPlayer(), input_args.seat,
+                           Role[input_args.role] if input_args.role else None):
+        total[decision.request] += 1
+        if decision.logged == decision.decided:
+            agreed[decision.request] += 1
+    elapsed: float = time.perf_counter() - start
+    print(f"{sum(total.values())} decisions in {elapsed:.2f}s")
+    for request in sorted(total):
+        print(f"{request:<8} {agreed[request] / total[request]:.3f} agreement ({total[request]} decisions)")
@@ -1,99 +1,77 @@
 from collections import deque
-from typing import Deque, List, Optional
+from typing import Deque, Optional
 
-from aiwolf import (Agent, ComingoutContentBuilder, Content,
-                    DivinedResultContentBuilder, GameInfo, GameSetting, Judge,
-                    Role, Species, Vote, VoteContentBuilder)
+import numpy as np
+from aiwolf import Agent, Content, GameInfo, GameSetting, Judge, Role, Species
 from aiwolf.constant import AGENT_NONE
 
-from const import CONTENT_SKIP
+from agent_mask import bit
+from game_diff import GameDelta
+from suspicion import (CO_FEATURES, FOUND_WEREWOLF, REQUEST_VOTE_FOR_ME,
+                       VOTE_TALK_FOR_ME, VOTED_FOR_ME, WEREWOLF_PROBABILITY,
+                       mask_to_vector, vector_to_mask, weights)
 from villager import HyunjiVillager
 
 
 class HyunjiSeer(HyunjiVillager):
+    # Found werewolves first, then fake seers, then agents against me.
+    VOTE_WEIGHTS: np.ndarray = weights({FOUND_WEREWOLF: 32, CO_FEATURES[Role.SEER]: 16, VOTE_TALK_FOR_ME: 8,
+                                        REQUEST_VOTE_FOR_ME: 4, VOTED_FOR_ME: 2, WEREWOLF_PROBABILITY: 1})
+
     co_date: int # Scheduled comingout date.
     has_co: bool # Whether or not comingout has done.
     my_judge_queue: Deque[Judge] # Queue of divination results.
-    not_divined_agents: List[Agent] # Agents that have not been divined.
-    werewolves: List[Agent] # Found werewolves.
-    vote_talk: List[Vote] # Talk containing VOTE.
-    voted_reports: List[Vote] # Time series of voting reports.
-    request_vote_talk: List[Vote] # Talk containing REQUEST VOTE.
+    not_divined: int # Bitmask of agents that have not been divined.
+    werewolves: int # Bitmask of found werewolves.
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, seed: Optional[int] = None) -> None:
+        super().__init__(seed)
         self.co_date = 0
         self.has_co = False
         self.my_judge_queue = deque()
-        self.not_divined_agents = []
-        self.werewolves = []
-        self.vote_talk = []
-        self.voted_reports = []
-        self.request_vote_talk = []
+        self.not_divined = 0
+        self.werewolves = 0
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         super().initialize(game_info, game_setting)
         self.co_date = 3
         self.has_co = False
         self.my_judge_queue.clear()
-        self.not_divined_agents = self.get_others(self.game_info.agent_list)
-        self.werewolves.clear()
-        self.vote_talk.clear()
-        self.voted_reports.clear()
-        self.request_vote_talk.clear()
+        self.not_divined = self.others
+        self.werewolves = 0
 
-    def day_start(self) -> None:
-        super().day_start()
-        judge: Optional[Judge] = self.game_info.divine_result
+    def add_results(self, delta: GameDelta) -> None:
+        super().add_results(delta)
+        judge: Optional[Judge] = delta.divine_result
         if judge is not None:
             self.my_judge_queue.append(judge)
-            if judge.target in self.not_divined_agents:
-                self.not_divined_agents.remove(judge.target)
+            self.not_divined &= ~bit(judge.target)
             if judge.result == Species.WEREWOLF:
-                self.werewolves.append(judge.target)
+                self.werewolves |= bit(judge.target)
+                self.suspicion.set(judge.target.agent_idx, FOUND_WEREWOLF, 1.0)
 
     def talk(self) -> Content:
-        # The list of agents that voted for me in the last turn.
-        voted_for_me: List[Agent] = [j.agent for j in self.voted_reports if j.target == self.me]
-        # The list of agents that said they would vote for me.
-        vote_talk_for_me: List[Agent] = [j.agent for j in self.vote_talk if j.target == self.me]
-        # The list of agents that requested to vote for me.
-        request_vote_for_me: List[Agent] = [j.agent for j in self.request_vote_talk if j.target == self.me]
-        
         # Do comingout if it's on scheduled day or a werewolf is found.
         if not self.has_co and (self.game_info.day == self.co_date or self.werewolves):
             self.has_co = True
-            return Content(ComingoutContentBuilder(self.me, Role.SEER))
+            return self.contents.comingout(self.me, Role.SEER)
         # Report the divination result after doing comingout.
         if self.has_co and self.my_judge_queue:
             judge: Judge = self.my_judge_queue.popleft()
-            return Content(DivinedResultContentBuilder(judge.target, judge.result))
-        # Vote for one of the alive werewolves.
-        candidates: List[Agent] = self.get_alive(self.werewolves)
-        # Vote for one of the alive fake seers if there are no candidates.
-        if not candidates:
-            candidates = self.get_alive([a for a in self.comingout_map
-                                         if self.comingout_map[a] == Role.SEER])
-        # Vote for one of the alive agents that can vote for me this turn.
-        if not candidates:
-            candidates = self.get_alive_others(vote_talk_for_me)
-        # Vote for one of the alive agents that requested to vote for me this turn.
-        if not candidates:
-            candidates = self.get_alive_others(request_vote_for_me)
-        # Vote for one of the alive agents that voted for me in the last turn.
-        if not candidates:
-            candidates = self.get_alive(voted_for_me)
-        # Vote for one of the alive agents if there are no candidates.
-        if not candidates:
-            candidates = self.get_alive_others(self.game_info.agent_list)
-        # Declare which to vote for if not declare yet or the candidate is changed.
-        if self.vote_candidate == AGENT_NONE or self.vote_candidate not in candidates:
-            self.vote_candidate = self.random_select(candidates)
-            if self.vote_candidate != AGENT_NONE:
-                return Content(VoteContentBuilder(self.vote_candidate))
-        return CONTENT_SKIP
+            return self.contents.divined_result(judge.target, judge.result)
+        return super().talk()
+
+    def get_divine_candidates(self) -> int:
+        """Return the bitmask of the alive undivined agents whose divination is expected to tell the most."""
+        eligible: int = self.not_divined & self.alive
+        if not eligible:
+            return self.not_divined
+        self.take_refined()
+        gains: np.ndarray = self.belief.information_gains()
+        mask: np.ndarray = mask_to_vector(eligible, gains.shape[0])
+        return vector_to_mask(mask & (gains >= gains[mask].max() - 1e-9))
 
     def divine(self) -> Agent:
-        # Divine a agent randomly chosen from undivined agents.
-        target: Agent = self.random_select(self.not_divined_agents)
+        # Divine a agent randomly chosen from the most informative undivined agents.
+        target: Agent = self.random_select(self.select(self.get_divine_candidates()))
         return target if target != AGENT_NONE else self.me
\ No newline at end of file
@@ -0,0 +1,232 @@
+import json
+import queue
+import socket
+import threading
+import time
+from argparse import ArgumentParser
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from engine import GameEngine, Packet
+from instrument import Histogram
+
+# Requests answered by the agents. The others are only notifications.
+ANSWERED_REQUESTS: frozenset = frozenset({"NAME", "ROLE", "TALK", "WHISPER", "VOTE", "DIVINE", "GUARD", "ATTACK"})
+# Requests answered with an agent.
+AGENT_REQUESTS: frozenset = frozenset({"VOTE", "DIVINE", "GUARD", "ATTACK"})
+# Seconds a table waits in the lobby between checks of the agents still connected.
+LOBBY_POLL: float = 0.5
+# Seconds a table short of agents waits in the lobby before it closes.
+LOBBY_TIMEOUT: float = 10.0
+
+
+class RoundTripStats:
+    """Round-trip latencies of the requests, shared by all games of the server."""
+    histograms: Dict[str, Histogram] # Histograms by request.
+    lock: threading.Lock # Lock of the histograms, updated from the game threads.
+
+    def __init__(self) -> None:
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def add(self, request: str, elapsed_ns: int) -> None:
+        """Record the round trip of a request."""
+        with self.lock:
+            histogram: Optional[Histogram] = self.histograms.get(request)
+            if histogram is None:
+                histogram = self.histograms[request] = Histogram()
+            histogram.add(elapsed_ns)
+
+    def report(self) -> str:
+        """Return the table of the round-trip latencies."""
+        lines: List[str] = [f"{'request':<17} {'count':>8} {'mean us':>9} {'p50 us':>8} {'p99 us':>8} {'max us':>9}"]
+        with self.lock:
+            for request, h in sorted(self.histograms.items()):
+                lines.append(f"{request:<17} {h.count:>8} {h.total_ns / h.count / 1000:>9.1f} "
+                             f"{h.percentile(0.5):>8} {h.percentile(0.99):>8} {h.max_ns / 1000:>9.1f}")
+        return "\n".join(lines)
+
+
+class RemoteSeat:
+    """A seat occupied by an agent connected over TCP, spoken to in the JSON lines of the AIWolf server."""
+    connection: socket.socket # Connection to the agent.
+    stream: BinaryIO # Buffered stream of the connection.
+    stats: RoundTripStats # Where the round trips are recorded.
+    name: str # Name the agent answered.
+    closed: bool # Whether the connection has been closed.
+
+    def __init__(self, connection: socket.socket, stats: RoundTripStats, timeout: float) -> None:
+        connection.settimeout(timeout)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connection = connection
+        self.stream = connection.makefile("rwb")
+        self.stats = stats
+        self.name = ""
+        self.closed = False
+
+    def request(self, packet: Packet) -> Any:
+        """Send the packet and return the answer, an agent index for the agent requests.
+        Raise ConnectionError if the agent has gone away."""
+        request: str = packet["request"]
+        start: int = time.perf_counter_ns()
+        self.stream.write(json.dumps(packet, separators=(",", ":")).encode() + b"\n")
+        self.stream.flush()
+        if request not in ANSWERED_REQUESTS:
+            return None
+        line: bytes = self.stream.readline()
+        self.stats.add(request, time.perf_counter_ns() - start)
+        if not line:
+            raise ConnectionError(f"{self.name or 'agent'} closed the connection")
+        answer: str = line.decode().strip()
+        if request not in AGENT_REQUESTS:
+            return answer
+        # Clients answer either {"agentIdx": n} or a bare index.
+        value: Any = json.loads(answer) if answer else None
+        return value.get("agentIdx") if isinstance(value, dict) else value
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.closed = True
+        try:
+            self.stream.close()
+            self.connection.close()
+        except OSError:
+            pass
+
+
+class StandInServer:
+    """Local stand-in for the AIWolf server, running games among the connected agents.
+    Agents wait in a lobby and play game after game while their connections last.
+    A table that cannot gather enough agents for lobby_timeout seconds, while fewer are connected
+    than all tables need, closes, so that the games go on at a lower concurrency or stop.
+    Roles are dealt at random; requested roles are not honoured."""
+    player_num: int # Number of players of a game.
+    time_limit: int # Time limit of a request in milliseconds.
+    lobby_timeout: float # Seconds a table short of agents waits before it closes.
+    lobby: "queue.Queue[RemoteSeat]" # Connected agents waiting for a game.
+    stats: RoundTripStats # Round-trip latencies of all games.
+    games_left: int # Number of games still to be started.
+    finished: int # Number of games played to the end.
+    connected: int # Number of agents whose connections are open.
+    tables: int # Number of tables still playing games.
+    lock: threading.Lock # Lock of the counters.
+
+    def __init__(self, player_num: int, games: int, time_limit: int = 1000,
+                 lobby_timeout: float = LOBBY_TIMEOUT) -> None:
+        self.player_num = player_num
+        self.time_limit = time_limit
+        self.lobby_timeout = lobby_timeout
+        self.lobby = queue.Queue()
+        self.stats = RoundTripStats()
+        self.games_left = games
+        self.finished = 0
+        self.connected = 0
+        self.tables = 0
+        self.lock = threading.Lock()
+
+    def accept(self, listener: socket.socket) -> None:
+        """Take the incoming connections into the lobby."""
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.connected += 1
+            self.lobby.put(RemoteSeat(connection, self.stats, self.time_limit / 1000 * 2))
+
+    def drop(self, seat: RemoteSeat) -> None:
+        """Close the connection of an agent that has gone away or failed a game."""
+        if seat.closed:
+            return
+        seat.close()
+        with self.lock:
+            self.connected -= 1
+
+    def gather(self) -> Optional[List[RemoteSeat]]:
+        """Return seats of agents answering NAME and ROLE, waiting in the lobby for enough of them,
+        or None if the table closes for lack of agents."""
+        seats: List[RemoteSeat] = []
+        waited: float = 0.0
+        while len(seats) < self.player_num:
+            try:
+                seat: RemoteSeat = self.lobby.get(timeout=LOBBY_POLL)
+            except queue.Empty:
+                waited += LOBBY_POLL
+                with self.lock:
+                    if waited < self.lobby_timeout or self.connected >= self.player_num * self.tables:
+                        continue
+                    self.tables -= 1
+                    print(f"table closed: {self.connected} agents connected, "
+                          f"{self.tables} tables of {self.player_num} left")
+                for seat in seats:  # For the tables left.
+                    self.lobby.put(seat)
+                return None
+            try:
+                seat.name = seat.request({"request": "NAME"})
+                seat.request({"request": "ROLE"})
+            except (OSError, ValueError):  # Gone after its last game.
+                self.drop(seat)
+                continue
+            seats.append(seat)
+            waited = 0.0
+        return seats
+
+    def play(self) -> None:
+        """Play games one after another until no games are left."""
+        while True:
+            with self.lock:
+                if self.games_left <= 0:
+                    return
+                self.games_left -= 1
+                seed: int = self.games_left
+            seats: Optional[List[RemoteSeat]] = self.gather()
+            if seats is None:
+                with self.lock:
+                    self.games_left += 1
+                return
+            try:
+                GameEngine(seats, seed=seed, time_limit=self.time_limit).run()
+            except (OSError, ValueError) as e:
+                print(f"game {seed} aborted: {e}")
+                for seat in seats:
+                    self.drop(seat)
+                continue
+            with self.lock:
+                self.finished += 1
+            for seat in seats:
+                self.lobby.put(seat)
+
+    def serve(self, hostname: str, port: int, concurrency: int) -> float:
+        """Run the games on the given number of threads and return the elapsed seconds."""
+        listener: socket.socket = socket.create_server((hostname, port))
+        threading.Thread(target=self.accept, args=(listener,), daemon=True).start()
+        threads: List[threading.Thread] = [threading.Thread(target=self.play, daemon=True) for _ in range(concurrency)]
+        self.tables = concurrency
+        start: float = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed: float = time.perf_counter() - start
+        listener.close()
+        while not self.lobby.empty():
+            self.lobby.get().close()
+        return elapsed
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(add_help=False)
+    parser.add_argument("-h", type=str, action="store", dest="hostname", default="localhost")
+    parser.add_argument("-p", type=int, action="store", dest="port", default=10000)
+    parser.add_argument("-n", type=int, action="store", dest="games", default=100)
+    parser.add_argument("-s", type=int, action="store", dest="players", default=5)
+    parser.add_argument("-c", type=int, action="store", dest="concurrency", default=1)
+    parser.add_argument("-t", type=int, action="store", dest="time_limit", default=1000)
+    parser.add_argument("-w", type=float, action="store", dest="lobby_timeout", default=LOBBY_TIMEOUT,
+                        help="seconds a table short of agents waits before it closes")
+    input_args = parser.parse_args()
+    server: StandInServer = StandInServer(input_args.players, input_args.games, input_args.time_limit,
+                                          input_args.lobby_timeout)
+    seconds: float = server.serve(input_args.hostname, input_args.port, input_args.concurrency)
+    print(f"{server.finished} games in {seconds:.2f}s ({server.finished / seconds:.1f} games/s)")
+    print(server.stats.report())
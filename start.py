@@ -1,15 +1,128 @@
+import asyncio
+import atexit
+import logging
+import threading
 from argparse import ArgumentParser
+from typing import TYPE_CHECKING, List, Optional
 
-from aiwolf import AbstractPlayer, TcpipClient
+from aiwolf import AbstractPlayer, Role, TcpipClient
+
+from hyunji_agent import HyunjiPlayer, preload
+from instrument import InstrumentedPlayer, LatencyRecorder
+from memory import MemoryTracker, TrackedPlayer
+from opponent_store import use_store
+from profiling import DETERMINISTIC, SAMPLING, ProfiledPlayer, ProfileSettings
+
+if TYPE_CHECKING:  # The export pulls in NumPy, so it is imported only when asked for.
+    from export import ExportWriter
+
+# Stack size of the agent threads. Agents never recurse deeply, so a small stack keeps memory low.
+THREAD_STACK_SIZE: int = 512 * 1024
+
+
+def agent_names(name: Optional[str], count: int) -> List[Optional[str]]:
+    """Return names of the hosted agents, numbered when more than one agent is hosted."""
+    if count == 1 or not name:
+        return [name] * count
+    return [f"{name}{i + 1}" for i in range(count)]
+
+
+def agent_roles(role: str, count: int) -> List[str]:
+    """Return requested roles of the hosted agents given as a comma-separated list."""
+    roles: List[str] = role.split(",")
+    return [roles[i] if i < len(roles) else roles[-1] for i in range(count)]
+
+
+def new_player(recorder: Optional[LatencyRecorder], writer: Optional["ExportWriter"] = None,
+               profile: Optional[ProfileSettings] = None, tracker: Optional[MemoryTracker] = None) -> AbstractPlayer:
+    """Return a new player, recording its callback latencies if a recorder is given,
+    exporting its decisions if a writer is given, profiling its games if profile settings are given
+    and counting its games for the memory tracker if one is given."""
+    hyunji: HyunjiPlayer = HyunjiPlayer()
+    player: AbstractPlayer = hyunji
+    if writer is not None:
+        from export import ExportingPlayer
+        player = ExportingPlayer(hyunji, writer)
+    if profile is not None:
+        player = ProfiledPlayer(player, profile)
+    if tracker is not None:
+        player = TrackedPlayer(player, tracker)
+    return InstrumentedPlayer(player, recorder) if recorder is not None else player
+
+
+def host(count: int, name: Optional[str], hostname: str, port: int, role: str,
+         recorder: Optional[LatencyRecorder] = None, writer: Optional["ExportWriter"] = None,
+         profile: Optional[ProfileSettings] = None, tracker: Optional[MemoryTracker] = None) -> None:
+    """Connect the given number of agents from this process and wait until all games are over."""
+    threading.stack_size(THREAD_STACK_SIZE)
+    threads: List[threading.Thread] = []
+    for agent_name, agent_role in zip(agent_names(name, count), agent_roles(role, count)):
+        agent: AbstractPlayer = new_player(recorder, writer, profile, tracker)
+        client: TcpipClient = TcpipClient(agent, agent_name, hostname, port, agent_role)
+        thread: threading.Thread = threading.Thread(target=client.connect, name=agent_name or None, daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
 
-from hyunji_agent import HyunjiPlayer
 
 if __name__ == "__main__":
-    agent: AbstractPlayer = HyunjiPlayer()
     parser: ArgumentParser = ArgumentParser(add_help=False)
     parser.add_argument("-p", type=int, action="store", dest="port", required=True)
     parser.add_argument("-h", type=str, action="store", dest="hostname", required=True)
     parser.add_argument("-r", type=str, action="store", dest="role", default="none")
     parser.add_argument("-n", type=str, action="store", dest="name")
+    parser.add_argument("-c", type=int, action="store", dest="count", default=1)
+    parser.add_argument("-i", type=int, action="store", dest="sample", default=0,
+                        help="time one in every SAMPLE callbacks (0 disables instrumentation)")
+    parser.add_argument("-o", type=str, action="store", dest="opponents",
+                        help="file remembering opponents across games, locked by this process")
+    parser.add_argument("-x", type=str, action="store", dest="export",
+                        help="export the decisions of the agents in villages of up to 15 players to this directory")
+    parser.add_argument("-a", action="store_true", dest="asyncio",
+                        help="serve all agents on one asyncio event loop")
+    parser.add_argument("-m", type=int, action="store", dest="memory", default=0,
+                        help="report the memory growth every MEMORY games of the agents (0 disables tracking)")
+    parser.add_argument("--profile", type=str, choices=[DETERMINISTIC, SAMPLING], dest="profile",
+                        help="profile the callbacks of the selected games")
+    parser.add_argument("--profile-dir", type=str, dest="profile_dir", default="profiles",
+                        help="directory of the profiles, dumped at the end of each profiled game")
+    parser.add_argument("--profile-roles", type=str, dest="profile_roles",
+                        help="comma-separated roles whose games are profiled (all by default)")
+    parser.add_argument("--profile-every", type=int, dest="profile_every", default=1,
+                        help="profile one in every N games of the hosted agents")
     input_args = parser.parse_args()
-    TcpipClient(agent, input_args.name, input_args.hostname, input_args.port, input_args.role).connect()
+    if input_args.opponents:
+        use_store(input_args.opponents)
+    if input_args.sample > 0 or input_args.memory > 0:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    recorder: Optional[LatencyRecorder] = None
+    if input_args.sample > 0:
+        recorder = LatencyRecorder(input_args.sample)
+    tracker: Optional[MemoryTracker] = None
+    if input_args.memory > 0:
+        tracker = MemoryTracker(input_args.memory)
+        tracker.start()
+    writer: Optional["ExportWriter"] = None
+    if input_args.export:
+        import export
+        writer = export.ExportWriter(input_args.export)
+        atexit.register(writer.close)
+    profile: Optional[ProfileSettings] = None
+    if input_args.profile:
+        profile = ProfileSettings(input_args.profile, input_args.profile_dir,
+                                  frozenset(Role[r] for r in input_args.profile_roles.split(","))
+                                  if input_args.profile_roles else None, input_args.profile_every)
+    # Answer NAME at once, and import the roles while waiting for the first game.
+    threading.Thread(target=preload, name="preload", daemon=True).start()
+    if input_args.asyncio:
+        from async_client import host_async
+        asyncio.run(host_async([new_player(recorder, writer, profile, tracker) for _ in range(input_args.count)],
+                               agent_names(input_args.name, input_args.count),
+                               agent_roles(input_args.role, input_args.count), input_args.hostname, input_args.port))
+    elif input_args.count == 1:
+        agent: AbstractPlayer = new_player(recorder, writer, profile, tracker)
+        TcpipClient(agent, input_args.name, input_args.hostname, input_args.port, input_args.role).connect()
+    else:
+        host(input_args.count, input_args.name, input_args.hostname, input_args.port, input_args.role,
+             recorder, writer, profile, tracker)
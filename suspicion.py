@@ -0,0 +1,85 @@
+from typing import Dict
+
+import numpy as np
+
+from aiwolf import Role
+
+# Evidence features, the columns of the suspicion matrix.
+DIVINED_WEREWOLF: int = 0 # Judged as a werewolf by non-fake seers.
+VOTE_TALK_FOR_ME: int = 1 # Said it would vote for me.
+REQUEST_VOTE_FOR_ME: int = 2 # Requested to vote for me.
+VOTED_FOR_ME: int = 3 # Reported it voted for me.
+FAKE_SEER: int = 4 # Reported me as a werewolf.
+TRUSTED_SEER: int = 5 # Reported divinations, except ones of me as a werewolf.
+FOUND_WEREWOLF: int = 6 # Judged as a werewolf by myself.
+CO_ANY: int = 7 # Claimed any role.
+CO_FEATURES: Dict[Role, int] = {Role.VILLAGER: 8, Role.SEER: 9, Role.MEDIUM: 10, Role.BODYGUARD: 11,
+                                Role.POSSESSED: 12, Role.WEREWOLF: 13} # Claimed the role.
+WEREWOLF_PROBABILITY: int = 14 # Probability of being a werewolf inferred from all claims and results.
+OPPONENT_WEREWOLF_RATE: int = 15 # Rate of past games the agent played on the werewolf side.
+NUM_FEATURES: int = 16
+
+
+def weights(feature_weights: Dict[int, float]) -> np.ndarray:
+    """Return the weight vector giving the weights to the features."""
+    w: np.ndarray = np.zeros(NUM_FEATURES)
+    for feature, weight in feature_weights.items():
+        w[feature] = weight
+    return w
+
+
+def mask_to_vector(mask: int, size: int) -> np.ndarray:
+    """Return the boolean vector of the given length whose elements are the bits of the mask."""
+    data: bytes = mask.to_bytes((size + 7) // 8, "little")
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=size, bitorder="little").astype(bool)
+
+
+def vector_to_mask(vector: np.ndarray) -> int:
+    """Return the bitmask whose bits are the elements of the boolean vector."""
+    return int.from_bytes(np.packbits(vector, bitorder="little").tobytes(), "little")
+
+
+class SuspicionMatrix:
+    """Agents × evidence features matrix, from which targets are chosen by weighted scores.
+    Rows are addressed by agent index."""
+    __slots__ = ("matrix",)
+    matrix: np.ndarray # Evidence counts of each agent.
+
+    def __init__(self, size: int = 0) -> None:
+        self.matrix = np.zeros((size, NUM_FEATURES))
+
+    def reset(self, size: int) -> None:
+        """Clear all evidence for a game with agent indices below the given size."""
+        if self.matrix.shape[0] == size:
+            self.matrix.fill(0.0)
+        else:
+            self.matrix = np.zeros((size, NUM_FEATURES))
+
+    def add(self, agent_idx: int, feature: int, value: float = 1.0) -> None:
+        """Add the value to the feature of the agent."""
+        self.matrix[agent_idx, feature] += value
+
+    def set(self, agent_idx: int, feature: int, value: float) -> None:
+        """Set the feature of the agent."""
+        self.matrix[agent_idx, feature] = value
+
+    def get(self, agent_idx: int, feature: int) -> float:
+        """Return the feature of the agent."""
+        return self.matrix[agent_idx, feature]
+
+    def set_column(self, feature: int, values: np.ndarray) -> None:
+        """Set the feature of all agents."""
+        self.matrix[:, feature] = values
+
+    def scores(self, w: np.ndarray) -> np.ndarray:
+        """Return the weighted score of each agent. Every feature counts as at most one."""
+        return np.minimum(self.matrix, 1.0) @ w
+
+    def best(self, w: np.ndarray, eligible: int) -> int:
+        """Return the bitmask of the eligible agents having the highest score."""
+        if not eligible:
+            return 0
+        scores: np.ndarray = self.scores(w)
+        mask: np.ndarray = mask_to_vector(eligible, scores.shape[0])
+        top: float = scores[mask].max()
+        return vector_to_mask(mask & (scores == top))
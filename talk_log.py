@@ -0,0 +1,222 @@
+import threading
+from collections import deque
+from typing import (Deque, Dict, Generic, Hashable, Iterator, List, Optional,
+                    Sequence, Tuple, TypeVar)
+
+from aiwolf import (Agent, Content, GameInfo, GameSetting, Judge, Operator,
+                    Role, Talk, Topic, Vote)
+
+from agent_mask import bit
+from content_cache import compile_content
+
+T = TypeVar("T")
+
+# Largest number of items kept by each history of a game. Older items are dropped.
+HISTORY_CAPACITY: int = 256
+# Number of days whose parsed talks are kept, so that memory does not grow with the length of a game.
+WINDOW_DAYS: int = 2
+
+
+class History(Generic[T]):
+    """Time series keeping only its latest items, with the count of all items ever appended,
+    so that readers can resume where they left off."""
+    __slots__ = ("items", "total")
+    items: Deque[T] # Latest items.
+    total: int # Number of items ever appended.
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY) -> None:
+        self.items = deque(maxlen=capacity)
+        self.total = 0
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def append(self, item: T) -> None:
+        """Append the item, dropping the oldest one if full."""
+        self.items.append(item)
+        self.total += 1
+
+    def since(self, count: int) -> List[T]:
+        """Return the items appended after the first count items, as far as they are kept."""
+        new: int = min(self.total - count, len(self.items))
+        return list(self.items)[len(self.items) - new:] if new > 0 else []
+
+
+class TalkEvent:
+    """A talk parsed once per game, with what it adds to the histories."""
+    __slots__ = ("day", "agent", "text", "content", "previous", "judge", "vote", "requests")
+    day: int # Day of the talk.
+    agent: Agent # Talker.
+    text: str # Text of the talk.
+    content: Content # Parsed content.
+    previous: Optional[Role] # Role the talker claimed before, for comingouts.
+    judge: Optional[Judge] # Reported judgement, for divination and identification reports.
+    vote: Optional[Vote] # Declared or reported vote.
+    requests: Tuple[Vote, ...] # Requested votes.
+
+    def __init__(self, talk: Talk, content: Content) -> None:
+        self.day = talk.day
+        self.agent = talk.agent
+        self.text = talk.text
+        self.content = content
+        self.previous = None
+        self.judge = None
+        self.vote = None
+        self.requests = ()
+
+
+class TalkLog:
+    """Append-only log of the parsed talks of a game, shared by our agents sitting at the same table.
+    Each agent reads it through its own cursor, so every talk is parsed and recorded once per game.
+    Games played at the same time may share a key. Their talks are told apart by talker and text, and while those
+    agree, the talks parse to the same histories; an agent finding a difference rebuilds a log of its own."""
+    key: Optional[Hashable] # Key of the game in the registry, or None if private to one agent.
+    readers: int # Number of agents attached to the log.
+    days: Dict[int, List[TalkEvent]] # Parsed talks of the latest days, in order of talk index.
+    comingout_map: Dict[Agent, Role] # Mapping between an agent and the role it claims that it is.
+    first_comingout: Dict[Agent, int] # Day of the first comingout of each agent.
+    seer_claims: int # Bitmask of agents that have claimed to be a seer.
+    divination_reports: History[Judge] # Time series of divination reports.
+    identification_reports: History[Judge] # Time series of identification reports.
+    vote_talk: History[Vote] # Talk containing VOTE.
+    shares: int # Number of shares of the agents to record in the opponent statistics, once the first is taken.
+    recorders: int # Number of shares taken.
+    lock: threading.Lock # Lock of appending and recording, as agents may run on several threads.
+
+    def __init__(self, key: Optional[Hashable] = None) -> None:
+        self.key = key
+        self.readers = 0
+        self.days = {}
+        self.comingout_map = {}
+        self.first_comingout = {}
+        self.seer_claims = 0
+        self.divination_reports = History()
+        self.identification_reports = History()
+        self.vote_talk = History()
+        self.shares = 0
+        self.recorders = 0
+        self.lock = threading.Lock()
+
+    def append(self, talk: Talk) -> TalkEvent:
+        """Parse the talk and add it to the histories."""
+        event: TalkEvent = TalkEvent(talk, compile_content(talk.text))
+        content: Content = event.content
+        if content.topic == Topic.COMINGOUT:
+            event.previous = self.comingout_map.get(talk.agent)
+            self.comingout_map[talk.agent] = content.role
+            self.first_comingout.setdefault(talk.agent, talk.day)
+            if content.role == Role.SEER:
+                self.seer_claims |= bit(talk.agent)
+        elif content.topic == Topic.DIVINED:
+            event.judge = Judge(talk.agent, talk.day, content.target, content.result)
+            self.divination_reports.append(event.judge)
+        elif content.topic == Topic.IDENTIFIED:
+            event.judge = Judge(talk.agent, talk.day, content.target, content.result)
+            self.identification_reports.append(event.judge)
+        elif content.topic == Topic.VOTE:
+            event.vote = Vote(talk.agent, talk.day, content.target)
+            self.vote_talk.append(event.vote)
+        elif content.topic == Topic.VOTED:
+            event.vote = Vote(talk.agent, talk.day, content.target)
+        elif content.topic == Topic.OPERATOR and content.operator == Operator.REQUEST:
+            event.requests = tuple(Vote(talk.agent, talk.day, c.target)
+                                   for c in content.content_list if c.topic == Topic.VOTE)
+        return event
+
+    def take_share(self) -> Tuple[int, int]:
+        """Return the share of the agents of the game the caller is to record in the opponent statistics,
+        as its number and the number of shares: one for each agent attached when the first share is taken,
+        so that the agents finishing the game split the recording between them.
+        Agents asking after all shares are taken get a number past the last share."""
+        with self.lock:
+            if self.shares == 0:
+                self.shares = max(self.readers, 1)
+            self.recorders += 1
+            return self.recorders - 1, self.shares
+
+    def read(self, day: int, talk_list: Sequence[Talk], cursor: int) -> List[TalkEvent]:
+        """Return the parsed talks of the talk list from the cursor on, parsing the ones nobody has read yet.
+        Raise ValueError if the talk list belongs to another game, which may then have added to the histories."""
+        events: Optional[List[TalkEvent]] = self.days.get(day)
+        if events is None or len(events) < len(talk_list):
+            with self.lock:
+                events = self.days.get(day)
+                if events is None:
+                    events = self.days[day] = []
+                    for old in [d for d in self.days if d <= day - WINDOW_DAYS]:
+                        del self.days[old]
+                for i in range(len(events), len(talk_list)):
+                    events.append(self.append(talk_list[i]))
+        for i in range(cursor, len(talk_list)):
+            if events[i].text != talk_list[i].text or events[i].agent != talk_list[i].agent:
+                raise ValueError("The talk list does not belong to the game of the log.")
+        return events[cursor:len(talk_list)]
+
+
+logs: Dict[Hashable, TalkLog] = {} # Talk logs of the games being played, by key.
+logs_lock: threading.Lock = threading.Lock()
+
+
+def game_key(game_info: GameInfo, game_setting: GameSetting) -> Hashable:
+    """Return the key of the game in the registry. Games played at the same time under the same settings
+    share it, as nothing in the game information tells them apart, so the log checks the talks as well."""
+    return getattr(game_setting, "random_seed", None), tuple(a.agent_idx for a in game_info.agent_list)
+
+
+class HistoryTalks:
+    """Parsed talks of a game that the histories of its talk log are made of, as far as the histories need them:
+    the first and the latest comingout of each agent and its first claim to be a seer,
+    and the latest reports and vote talks, as many as a history keeps.
+    An agent keeps them for its own game, so that it can rebuild the histories in a log of its own
+    if another game turns out to share its log, without keeping every talk of the game."""
+    __slots__ = ("count", "comingouts", "reports")
+    count: int # Number of talks added, which orders them.
+    comingouts: Dict[Tuple[Agent, str], Tuple[int, TalkEvent]] # Comingouts by agent and which of them they are.
+    reports: Dict[Topic, Deque[Tuple[int, TalkEvent]]] # Latest reports and vote talks, by topic.
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.comingouts = {}
+        self.reports = {t: deque(maxlen=HISTORY_CAPACITY) for t in (Topic.DIVINED, Topic.IDENTIFIED, Topic.VOTE)}
+
+    def add(self, event: TalkEvent) -> None:
+        """Keep the talk if the histories need it."""
+        topic: Topic = event.content.topic
+        if topic == Topic.COMINGOUT:
+            self.count += 1
+            self.comingouts.setdefault((event.agent, "first"), (self.count, event))
+            self.comingouts[(event.agent, "latest")] = (self.count, event)
+            if event.content.role == Role.SEER:
+                self.comingouts.setdefault((event.agent, "seer"), (self.count, event))
+        elif topic in self.reports:
+            self.count += 1
+            self.reports[topic].append((self.count, event))
+
+    def replay(self, log: TalkLog, day: int) -> None:
+        """Add the talks kept from the days before the given one to the histories of the log."""
+        kept: Dict[int, TalkEvent] = {n: e for n, e in self.comingouts.values() if e.day < day}
+        for reports in self.reports.values():
+            kept.update((n, e) for n, e in reports if e.day < day)
+        for n in sorted(kept):
+            log.append(kept[n])  # type: ignore
+
+
+def attach(key: Hashable) -> TalkLog:
+    """Return the talk log of the game, shared with the other agents of the game in this process."""
+    with logs_lock:
+        log: Optional[TalkLog] = logs.get(key)
+        if log is None:
+            log = logs[key] = TalkLog(key)
+        log.readers += 1
+        return log
+
+
+def release(log: TalkLog) -> None:
+    """Detach an agent from the talk log, which is forgotten when no agent reads it any more."""
+    with logs_lock:
+        log.readers -= 1
+        if log.readers <= 0 and log.key is not None and logs.get(log.key) is log:
+            del logs[log.key]
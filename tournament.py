@@ -0,0 +1,137 @@
+import logging
+import os
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+from aiwolf import AbstractPlayer, Role, Species
+
+import belief
+from engine import GameEngine
+from export import MAX_AGENTS, ExportingPlayer, ExportWriter, exportable
+from hyunji_agent import HyunjiPlayer
+from memory import MemoryTracker
+
+# Number of games played by a worker process per task.
+CHUNK_SIZE: int = 50
+
+# Wins and games of each role in each configuration, keyed by (number of players, role).
+Tally = Tuple[Counter, Counter]
+
+# Players of each configuration, reused across the games played by this process.
+players_by_size: Dict[int, List[HyunjiPlayer]] = {}
+# Writer of the decisions of the players of this process, if they are exported.
+writer: Optional[ExportWriter] = None
+# Tracker of the memory of this process, if it is tracked.
+tracker: Optional[MemoryTracker] = None
+
+
+def init_worker(directory: Optional[str], memory_interval: int = 0) -> None:
+    """Export the decisions of the players of this process to the directory, if one is given,
+    and report the memory growth every given number of games, if any.
+    Refinements are fixed so that every game replays from its seed."""
+    global writer, tracker
+    belief.use_fixed_refinement()
+    writer = ExportWriter(directory) if directory else None
+    tracker = None
+    if memory_interval > 0:
+        logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [{os.getpid()}] %(message)s")
+        tracker = MemoryTracker(memory_interval)
+        tracker.start()
+
+
+def seat_seed(game_seed: int, seat: int) -> int:
+    """Return the seed of the agent on the seat in the game with the given seed."""
+    return game_seed << 16 | seat
+
+
+def play_game(player_num: int, game_seed: int) -> GameEngine:
+    """Play the game with the given seed and return its engine.
+    Every agent is reseeded from the game seed, so the same seed replays the same game."""
+    players: Optional[List[HyunjiPlayer]] = players_by_size.get(player_num)
+    if players is None:
+        players = players_by_size[player_num] = [HyunjiPlayer() for _ in range(player_num)]
+    for seat, player in enumerate(players):
+        player.reseed(seat_seed(game_seed, seat))
+    seats: List[AbstractPlayer] = [ExportingPlayer(p, writer) for p in players] if writer is not None else players
+    engine: GameEngine = GameEngine(seats, seed=game_seed)
+    engine.run()
+    if tracker is not None:
+        tracker.game_finished()
+    return engine
+
+
+def play_chunk(task: Tuple[int, int, int]) -> Tally:
+    """Play the given number of games from the first seed on, and count the wins of each role."""
+    player_num, first_seed, count = task
+    wins: Counter = Counter()
+    games: Counter = Counter()
+    for game_seed in range(first_seed, first_seed + count):
+        engine: GameEngine = play_game(player_num, game_seed)
+        for role in engine.roles.values():
+            side: Species = Species.WEREWOLF if role in (Role.WEREWOLF, Role.POSSESSED) else Species.HUMAN
+            games[(player_num, role)] += 1
+            if side == engine.winner:
+                wins[(player_num, role)] += 1
+        games[(player_num, None)] += 1
+        if engine.winner == Species.HUMAN:
+            wins[(player_num, None)] += 1
+    if writer is not None:  # Worker processes are terminated without exit handlers.
+        writer.flush()
+    return wins, games
+
+
+def run(player_nums: List[int], games: int, seed: int, processes: int, export: Optional[str] = None,
+        memory_interval: int = 0) -> Tally:
+    """Play the given number of games of each configuration on a pool of processes,
+    exporting the decisions to the given directory if any and reporting the memory growth if asked to."""
+    tasks: List[Tuple[int, int, int]] = [(n, first, min(CHUNK_SIZE, games - first + seed))
+                                         for n in player_nums for first in range(seed, seed + games, CHUNK_SIZE)]
+    wins: Counter = Counter()
+    total: Counter = Counter()
+    with Pool(processes, init_worker, (export, memory_interval)) as pool:
+        for chunk_wins, chunk_games in pool.imap_unordered(play_chunk, tasks):
+            wins.update(chunk_wins)
+            total.update(chunk_games)
+    return wins, total
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument("-n", type=int, action="store", dest="games", default=1000,
+                        help="number of games of each configuration")
+    parser.add_argument("-p", type=str, action="store", dest="players", default="5,15",
+                        help="comma-separated numbers of players of the configurations")
+    parser.add_argument("-s", type=int, action="store", dest="seed", default=0, help="seed of the first game")
+    parser.add_argument("-j", type=int, action="store", dest="processes", default=os.cpu_count() or 1)
+    parser.add_argument("-g", type=int, action="store", dest="replay",
+                        help="replay the game with this seed and print its talk log")
+    parser.add_argument("-x", type=str, action="store", dest="export",
+                        help="export the decisions of the agents to this directory")
+    parser.add_argument("-m", type=int, action="store", dest="memory", default=0,
+                        help="report the memory growth of each process every MEMORY games (0 disables tracking)")
+    input_args = parser.parse_args()
+    player_nums: List[int] = [int(n) for n in input_args.players.split(",")]
+    if input_args.export and not all(exportable(n) for n in player_nums):
+        parser.error(f"games of more than {MAX_AGENTS - 1} players cannot be exported")
+    if input_args.replay is not None:
+        belief.use_fixed_refinement()
+        replayed: GameEngine = play_game(player_nums[0], input_args.replay)
+        for talk in replayed.talks:
+            print(f"day {talk['day']} turn {talk['turn']} agent {talk['agent']}: {talk['text']}")
+        print(f"winner: {replayed.winner.name if replayed.winner else None}")
+    else:
+        start: float = time.perf_counter()
+        wins, total = run(player_nums, input_args.games, input_args.seed, input_args.processes,
+                          input_args.export, input_args.memory)
+        elapsed: float = time.perf_counter() - start
+        print(f"{input_args.games * len(player_nums)} games in {elapsed:.2f}s "
+              f"({input_args.games * len(player_nums) / elapsed:.0f} games/s on {input_args.processes} processes)")
+        for n in player_nums:
+            print(f"{n} players: human win rate {wins[(n, None)] / total[(n, None)]:.3f}")
+            for role in Role:
+                if total[(n, role)]:
+                    print(f"  {role.name:<10} {wins[(n, role)] / total[(n, role)]:.3f} "
+                          f"({total[(n, role)]} agent games)")
@@ -1,40 +1,82 @@
 import random
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 from aiwolf import (AbstractPlayer, Agent, Content, GameInfo, GameSetting,
-                    Judge, Role, Species, Status, Talk, Topic, Vote, Operator, VoteContentBuilder)
+                    Judge, Role, Species, Talk, Topic, Operator, Vote)
 from aiwolf.constant import AGENT_NONE
 
+from agent_mask import AgentIndex, bit
+import opponent_store
+from anytime import AnytimeWorker, Deadline
+import belief
+from belief import Refined, RoleBelief
 from const import CONTENT_SKIP
+from content_cache import ContentTable, content_table
+from game_diff import GameDelta, GameDiff
+from opponent_store import OpponentStats, player_names
+from suspicion import (CO_ANY, CO_FEATURES, DIVINED_WEREWOLF, FAKE_SEER,
+                       OPPONENT_WEREWOLF_RATE, REQUEST_VOTE_FOR_ME,
+                       TRUSTED_SEER, VOTE_TALK_FOR_ME, VOTED_FOR_ME,
+                       WEREWOLF_PROBABILITY, SuspicionMatrix, weights)
+from talk_log import HistoryTalks, TalkEvent, TalkLog, attach, game_key, release
     
 class HyunjiVillager(AbstractPlayer):
+    # Weights of the evidence for choosing the vote target.
+    # Each weight is larger than the sum of the smaller ones, so that stronger evidence takes priority.
+    VOTE_WEIGHTS: np.ndarray = weights({DIVINED_WEREWOLF: 32, VOTE_TALK_FOR_ME: 16, REQUEST_VOTE_FOR_ME: 8,
+                                        VOTED_FOR_ME: 4, FAKE_SEER: 2, WEREWOLF_PROBABILITY: 1,
+                                        OPPONENT_WEREWOLF_RATE: 0.25})
+
     me: Agent # Myself.
     vote_candidate: Agent # Candidate for voting.
     game_info: GameInfo # Information about current game.
     game_setting: GameSetting # Settings of current game.
-    comingout_map: Dict[Agent, Role] # Mapping between an agent and the role it claims that it is.
-    divination_reports: List[Judge] # Time series of divination reports.
-    identification_reports: List[Judge] # Time series of identification reports.
-    vote_talk: List[Vote] # Talk containing VOTE.
-    voted_reports: List[Vote] # Time series of voting reports.
-    request_vote_talk: List[Vote] # Talk containing REQUEST VOTE.
-    talk_list_head: int # Index of the talk to be analysed next.
-
-    def __init__(self) -> None:
+    agent_index: AgentIndex # Agents of current game addressed by agent index.
+    contents: ContentTable # Contents that can be sent in current game, built in advance.
+    alive: int # Bitmask of alive agents.
+    others: int # Bitmask of agents other than myself.
+    talk_log: TalkLog # Parsed talks and their histories, shared with our other agents in the game.
+    history_talks: HistoryTalks # Talks of this game the histories are made of, to rebuild the talk log from.
+    suspicion: SuspicionMatrix # Evidence against each agent.
+    belief: RoleBelief # Role assignments consistent with all claims and results.
+    game_diff: GameDiff # Turns the game information of each request into what changed.
+    delta: GameDelta # What changed with the latest game information.
+    player_names: Dict[Agent, str] # Names of the players of the agents reported at the start of the game.
+    opponent_stats: Dict[Agent, OpponentStats] # Statistics of the agents in past games, looked up once a game.
+    cast_votes: List[Vote] # Votes cast in this game, for the statistics of the opponents.
+    candidate_cache: Dict[str, int] # Candidates of each decision, valid until new information arrives.
+    rng: random.Random # Random number generator of this agent, so that games can be replayed from seeds.
+    deadline: Deadline # Deadline of the request being answered.
+    worker: AnytimeWorker # Background worker for speculative inference.
+    speculated_version: int # Version of the belief the latest speculation started from.
+
+    def __init__(self, seed: Optional[int] = None) -> None:
         self.me = AGENT_NONE
         self.vote_candidate = AGENT_NONE
         self.game_info = None  # type: ignore
-        self.comingout_map = {}
-        self.divination_reports = []
-        self.identification_reports = []
-        self.vote_talk = []
-        self.voted_reports = []
-        self.request_vote_talk = []
-        self.talk_list_head = 0
+        self.agent_index = AgentIndex()
+        self.contents = content_table(())
+        self.alive = 0
+        self.others = 0
+        self.talk_log = TalkLog()
+        self.history_talks = HistoryTalks()
+        self.suspicion = SuspicionMatrix()
+        self.belief = RoleBelief(seed)
+        self.game_diff = GameDiff()
+        self.delta = GameDelta(-1, 0)
+        self.player_names = {}
+        self.opponent_stats = {}
+        self.cast_votes = []
+        self.candidate_cache = {}
+        self.rng = random.Random(seed)
+        self.deadline = Deadline(0.0)
+        self.worker = AnytimeWorker()
+        self.speculated_version = -1
 
     def is_alive(self, agent: Agent) -> bool:
         """Bool value of whether the agent is alive."""
-        return self.game_info.status_map[agent] == Status.ALIVE
+        return self.alive >> agent.agent_idx & 1 == 1
 
     def get_others(self, agent_list: List[Agent]) -> List[Agent]:
         """Return a list of agents excluding myself from the given list of agents."""
@@ -42,93 +84,243 @@ class HyunjiVillager(AbstractPlayer):
 
     def get_alive(self, agent_list: List[Agent]) -> List[Agent]:
         """Return a list of alive agents contained in the given list of agents."""
-        return [a for a in agent_list if self.is_alive(a)]
+        alive: int = self.alive
+        return [a for a in agent_list if alive >> a.agent_idx & 1]
 
     def get_alive_others(self, agent_list: List[Agent]) -> List[Agent]:
         """Return a list of alive agents that is contained in the given list of agents
         and is not equal to myself."""
         return self.get_alive(self.get_others(agent_list))
 
+    def select(self, mask: int) -> List[Agent]:
+        """Return a list of agents contained in the given bitmask."""
+        return self.agent_index.select(mask)
+
     def random_select(self, agent_list: List[Agent]) -> Agent:
         """Return one agent randomly chosen from the given list of agents."""
-        return random.choice(agent_list) if agent_list else AGENT_NONE
+        return self.rng.choice(agent_list) if agent_list else AGENT_NONE
+
+    def reseed(self, seed: Optional[int]) -> None:
+        """Restart the random number generators from the seed."""
+        self.rng.seed(seed)
+        self.belief.reseed(seed)
+
+    def get_cached_candidates(self, decision: str, choose: Callable[[], int]) -> int:
+        """Return the bitmask of candidates of the decision, choosing them again only if
+        new talk or status changes have arrived since the last choice."""
+        candidates: Optional[int] = self.candidate_cache.get(decision)
+        if candidates is None:
+            candidates = self.candidate_cache[decision] = choose()
+        return candidates
+
+    def speculate(self) -> None:
+        """Begin drawing more samples of the belief in the background for the coming decisions,
+        unless the belief has not changed since the last time. Enumerated beliefs are exact already."""
+        if not self.belief.sampled or self.belief.version == self.speculated_version:
+            return
+        self.speculated_version = self.belief.version
+        self.worker.start("belief", self.belief.snapshot().refine, self.deadline)
+
+    def take_refined(self) -> None:
+        """Take the samples drawn in the background into a sampled belief, waiting for them until the deadline,
+        and go without them if they are late. Fixed refinements are waited for however long they take."""
+        if self.belief.sampled:
+            deadline: Optional[Deadline] = self.deadline if belief.refine_batches is None else None
+            refined: Optional[Refined] = self.worker.take("belief", deadline, lambda: None)
+            if refined is not None:
+                self.belief.merge(refined)
+
+    def get_werewolf_probabilities(self) -> np.ndarray:
+        """Return the werewolf probabilities of the belief, with the samples drawn in the background."""
+        self.take_refined()
+        return self.belief.werewolf_probabilities()
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
+        self.deadline = Deadline.from_setting(game_setting)
         self.game_info = game_info
         self.game_setting = game_setting
         self.me = game_info.me
-        self.comingout_map.clear()
-        self.divination_reports.clear()
-        self.identification_reports.clear()
-        self.vote_talk.clear()
-        self.voted_reports.clear()
-        self.request_vote_talk.clear()
+        self.agent_index = AgentIndex(game_info.agent_list)
+        self.contents = content_table(tuple(game_info.agent_list))
+        self.game_diff.reset()
+        self.delta = self.game_diff.diff(game_info)
+        self.alive = self.delta.alive
+        self.others = self.agent_index.all & ~bit(self.me)
+        release(self.talk_log)
+        self.talk_log = attach(game_key(game_info, game_setting))
+        self.history_talks = HistoryTalks()
+        self.suspicion.reset(len(self.agent_index.agents))
+        self.player_names = player_names(game_info)
+        self.opponent_stats.clear()
+        self.cast_votes.clear()
+        if opponent_store.shared_store is not None:
+            for agent in self.select(self.others):
+                rate: float = self.get_opponent_stats(agent).werewolf_rate
+                self.suspicion.set(agent.agent_idx, OPPONENT_WEREWOLF_RATE, rate)
+        self.belief.reset(len(self.agent_index.agents), self.me.agent_idx, game_info.my_role,
+                          game_setting.role_num_map,
+                          [a.agent_idx for a, r in game_info.role_map.items() if r == Role.WEREWOLF])
+        self.candidate_cache.clear()
+        self.speculate()
+
+    def add_divination_report(self, judge: Judge) -> None:
+        """Add the evidence derived from a divination report."""
+        seer: int = judge.agent.agent_idx
+        self.belief.add_judge(seer, judge.target.agent_idx, judge.result == Species.WEREWOLF)
+        if judge.result != Species.WEREWOLF or judge.target != self.me:
+            self.suspicion.add(seer, TRUSTED_SEER)
+        if judge.result != Species.WEREWOLF:
+            return
+        if self.is_fake_seer(judge.agent):
+            return
+        if judge.target == self.me:
+            # A new fake seer invalidates all of its past reports.
+            self.suspicion.add(seer, FAKE_SEER)
+            with self.talk_log.lock:  # Other agents of the game may be appending to the reports.
+                reports: List[Judge] = list(self.talk_log.divination_reports)
+            for j in reports:
+                if j is judge:
+                    break
+                if j.agent == judge.agent and j.result == Species.WEREWOLF and j.target != self.me:
+                    self.suspicion.add(j.target.agent_idx, DIVINED_WEREWOLF, -1.0)
+        else:
+            self.suspicion.add(judge.target.agent_idx, DIVINED_WEREWOLF)
+
+    def add_comingout(self, agent: Agent, role: Role, previous: Optional[Role]) -> None:
+        """Add the evidence of the role claimed by the agent, replacing its previous claim."""
+        if previous in CO_FEATURES:
+            self.suspicion.set(agent.agent_idx, CO_FEATURES[previous], 0.0)
+        self.belief.add_claim(agent.agent_idx, role)
+        if role in CO_FEATURES:
+            self.suspicion.set(agent.agent_idx, CO_FEATURES[role], 1.0)
+        self.suspicion.set(agent.agent_idx, CO_ANY, 1.0)
+
+    def get_opponent_stats(self, agent: Agent) -> OpponentStats:
+        """Return the statistics of the agent in past games, all zero if its player is unnamed."""
+        stats: Optional[OpponentStats] = self.opponent_stats.get(agent)
+        if stats is None:
+            store: Optional[opponent_store.OpponentStore] = opponent_store.shared_store
+            name: Optional[str] = self.player_names.get(agent)
+            stats = self.opponent_stats[agent] = store.get(name) if store is not None and name is not None \
+                else OpponentStats()
+        return stats
+
+    def record_opponents(self) -> None:
+        """Add what the agents whose players are named did in this game to their statistics.
+        Our agents in the game each record their share of the agents."""
+        store: Optional[opponent_store.OpponentStore] = opponent_store.shared_store
+        if store is None:
+            return
+        share, shares = self.talk_log.take_share()
+        if share >= shares:
+            return
+        named: List[Tuple[Agent, str]] = list(self.player_names.items())[share::shares]
+        roles: Dict[Agent, Role] = self.game_info.role_map
+        first_co: Dict[Agent, int] = self.talk_log.first_comingout
+        seer_claims: int = self.talk_log.seer_claims
+        votes_by_voter: Dict[Agent, List[Vote]] = {}
+        for vote in self.cast_votes:
+            votes_by_voter.setdefault(vote.agent, []).append(vote)
+        for agent, name in named:
+            role: Optional[Role] = roles.get(agent)
+            claimed_seer: bool = seer_claims & bit(agent) != 0
+            votes: List[Vote] = votes_by_voter.get(agent, [])
+            store.update(name, (
+                1, role == Role.WEREWOLF, role == Role.POSSESSED, claimed_seer, claimed_seer and role != Role.SEER,
+                first_co.get(agent, 0), agent in first_co,
+                len(votes), sum(roles.get(v.target) == Role.WEREWOLF for v in votes)))
+
+    def is_fake_seer(self, agent: Agent) -> bool:
+        """Bool value of whether the agent reported me as a werewolf."""
+        return self.suspicion.get(agent.agent_idx, FAKE_SEER) > 0
 
     def day_start(self) -> None:
-        self.talk_list_head = 0
+        self.cast_votes.extend(self.game_info.vote_list)
         self.vote_candidate = AGENT_NONE
+        self.candidate_cache.clear()
+        # Some werewolf is still alive.
+        self.belief.add_alive(self.alive)
+        self.speculate()
 
     def update(self, game_info: GameInfo) -> None:
+        # Every request starts with an update, so its deadline starts now.
+        self.deadline = Deadline.from_setting(self.game_setting)
+        delta: GameDelta = self.game_diff.diff(game_info)
+        self.delta = delta
+        # Invalidate the cached decisions if there is new talk or someone died.
+        if delta.died:
+            self.alive = delta.alive
+            self.candidate_cache.clear()
+        if delta.talks:
+            self.candidate_cache.clear()
         self.game_info = game_info  # Update game information.
-        for i in range(self.talk_list_head, len(game_info.talk_list)):  # Analyze talks that have not been analyzed yet.
-            tk: Talk = game_info.talk_list[i]  # The talk to be analyzed.
-            talker: Agent = tk.agent
+        self.add_results(delta)
+        for event in self.read_talks(delta):  # Analyze talks that have not been analyzed yet.
+            talker: Agent = event.agent
             if talker == self.me:  # Skip my talk.
                 continue
-            content: Content = Content.compile(tk.text)
+            content: Content = event.content
             if content.topic == Topic.COMINGOUT:
-                self.comingout_map[talker] = content.role
+                self.add_comingout(talker, content.role, event.previous)
             elif content.topic == Topic.DIVINED:
-                self.divination_reports.append(Judge(talker, game_info.day, content.target, content.result))
+                self.add_divination_report(event.judge)
             elif content.topic == Topic.IDENTIFIED:
-                self.identification_reports.append(Judge(talker, game_info.day, content.target, content.result))
+                self.belief.add_judge(talker.agent_idx, content.target.agent_idx, content.result == Species.WEREWOLF)
             elif content.topic == Topic.VOTE:
-                self.vote_talk.append(Vote(talker, game_info.day, content.target))
-            elif content.topic == Topic.VOTED: 
-                self.voted_reports.append(Vote(talker, game_info.day, content.target))
+                if content.target == self.me:
+                    self.suspicion.add(talker.agent_idx, VOTE_TALK_FOR_ME)
+            elif content.topic == Topic.VOTED:
+                if content.target == self.me:
+                    self.suspicion.add(talker.agent_idx, VOTED_FOR_ME)
             elif content.topic == Topic.OPERATOR and content.operator == Operator.REQUEST:
-                for contents in content.content_list:
-                    if contents.topic == Topic.VOTE:
-                        self.request_vote_talk.append(Vote(talker, game_info.day, contents.target))
-        self.talk_list_head = len(game_info.talk_list)  # All done.
+                for vote in event.requests:
+                    if vote.target == self.me:
+                        self.suspicion.add(talker.agent_idx, REQUEST_VOTE_FOR_ME)
+        if delta.talks:
+            self.speculate()
+
+    def add_results(self, delta: GameDelta) -> None:
+        """Add the evidence of the new results. My own results are true and attacked agents are humans."""
+        for judge in (delta.divine_result, delta.medium_result):
+            if judge is not None:
+                self.belief.add_fact(judge.target.agent_idx, judge.result == Species.WEREWOLF)
+        for agent in delta.last_dead:
+            self.belief.add_fact(agent.agent_idx, False)
+
+    def read_talks(self, delta: GameDelta) -> List[TalkEvent]:
+        """Return the parsed talks that have not been analyzed yet."""
+        talk_list: List[Talk] = self.game_info.talk_list
+        try:
+            events: List[TalkEvent] = self.talk_log.read(delta.day, talk_list, delta.talk_start)
+        except ValueError:
+            # Another game took the same key and its talks may have got into the histories,
+            # so go on with a log of my own, rebuilt from the talks of this game the histories are made of.
+            release(self.talk_log)
+            self.talk_log = TalkLog()
+            self.history_talks.replay(self.talk_log, delta.day)
+            events = self.talk_log.read(delta.day, talk_list, delta.talk_start)
+        for event in events:
+            self.history_talks.add(event)
+        return events
+
+    def get_vote_weights(self) -> np.ndarray:
+        """Return the weights of the evidence for choosing the vote target."""
+        return self.VOTE_WEIGHTS
+
+    def get_vote_candidates(self) -> int:
+        """Return the bitmask of candidates to be voted for."""
+        self.suspicion.set_column(WEREWOLF_PROBABILITY, self.get_werewolf_probabilities())
+        # Vote for one of the alive agents with the strongest evidence against them.
+        return self.suspicion.best(self.get_vote_weights(), self.alive & self.others)
 
     def talk(self) -> Content:
         # Choose an agent to be voted for while talking.
-        
-        # The list of agents that voted for me in the last turn.
-        voted_for_me: List[Agent] = [j.agent for j in self.voted_reports if j.target == self.me]
-        # The list of agents that said they would vote for me.
-        vote_talk_for_me: List[Agent] = [j.agent for j in self.vote_talk if j.target == self.me]
-        # The list of agents that requested to vote for me.
-        request_vote_for_me: List[Agent] = [j.agent for j in self.request_vote_talk if j.target == self.me]
-        # The list of fake seers that reported me as a werewolf.
-        fake_seers: List[Agent] = [j.agent for j in self.divination_reports
-                                if j.target == self.me and j.result == Species.WEREWOLF]
-        reported_wolves: List[Agent] = [j.target for j in self.divination_reports
-                                        if j.agent not in fake_seers and j.result == Species.WEREWOLF]
-        
-        # Vote for one of the alive agents that were judged as werewolves by non-fake seers.
-        candidates: List[Agent] = self.get_alive_others(reported_wolves)
-        # Vote for one of the alive agents that can vote for me this turn.
-        if not candidates:
-            candidates = self.get_alive_others(vote_talk_for_me)
-        # Vote for one of the alive agents that requested to vote for me this turn.
-        if not candidates:
-            candidates = self.get_alive_others(request_vote_for_me)
-        # Vote for one of the alive agents that voted for me in the last turn.
-        if not candidates:
-            candidates = self.get_alive(voted_for_me)
-        # Vote for one of the alive fake seers if there are no candidates.
-        if not candidates:
-            candidates = self.get_alive(fake_seers)
-        # Vote for one of the alive agents if there are no candidates.
-        if not candidates:
-            candidates = self.get_alive_others(self.game_info.agent_list)
+        candidates: int = self.get_cached_candidates("vote", self.get_vote_candidates)
         # Declare which to vote for if not declare yet or the candidate is changed.
-        if self.vote_candidate == AGENT_NONE or self.vote_candidate not in candidates:
-            self.vote_candidate = self.random_select(candidates)
+        if self.vote_candidate == AGENT_NONE or not candidates & bit(self.vote_candidate):
+            self.vote_candidate = self.random_select(self.select(candidates))
             if self.vote_candidate != AGENT_NONE:
-                return Content(VoteContentBuilder(self.vote_candidate))
+                return self.contents.vote(self.vote_candidate)
         return CONTENT_SKIP
 
     def vote(self) -> Agent:
@@ -147,4 +339,10 @@ class HyunjiVillager(AbstractPlayer):
         raise NotImplementedError()
 
     def finish(self) -> None:
-        pass
\ No newline at end of file
+        self.worker.close()
+        # The votes of the last day have not been seen at a day start.
+        self.cast_votes.extend(self.game_info.vote_list)
+        self.record_opponents()
+        release(self.talk_log)
+        self.talk_log = TalkLog()
+        self.history_talks = HistoryTalks()
\ No newline at end of file
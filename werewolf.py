@@ -1,41 +1,50 @@
-import random
-from typing import List
+from typing import Optional
 
-from aiwolf import (Agent, AttackContentBuilder, ComingoutContentBuilder,
-                    Content, GameInfo, GameSetting, Judge, Role, Species)
+import numpy as np
+from aiwolf import Agent, Content, GameInfo, GameSetting, Judge, Role, Species
 from aiwolf.constant import AGENT_NONE
 
+from agent_mask import bit, count, mask_of
 from const import CONTENT_SKIP, JUDGE_EMPTY
 from possessed import HyunjiPossessed
+from suspicion import CO_ANY, weights
+from wolf_team import WolfTeam
 
 
 class HyunjiWerewolf(HyunjiPossessed):
-    allies: List[Agent] # Allies.
-    humans: List[Agent] # Humans.
-    attack_vote_candidate: Agent # The candidate for the attack voting.
+    # Weights of the evidence for choosing the attack target.
+    ATTACK_WEIGHTS: np.ndarray = weights({CO_ANY: 1})
+    allies: int # Bitmask of allies.
+    humans: int # Bitmask of humans.
+    attack_vote_candidate: Agent # My own candidate for the attack voting.
+    declared: Agent # Attack target declared in whispers today.
+    team: WolfTeam # Attack votes and fake roles declared in whispers.
 
-    def __init__(self) -> None:
-        super().__init__()
-        self.allies = []
-        self.humans = []
+    def __init__(self, seed: Optional[int] = None) -> None:
+        super().__init__(seed)
+        self.allies = 0
+        self.humans = 0
         self.attack_vote_candidate = AGENT_NONE
+        self.declared = AGENT_NONE
+        self.team = WolfTeam()
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         super().initialize(game_info, game_setting)
-        self.allies = list(self.game_info.role_map.keys())
-        self.humans = [a for a in self.game_info.agent_list if a not in self.allies]
+        self.allies = mask_of(self.game_info.role_map.keys())
+        self.humans = self.agent_index.all & ~self.allies
+        self.team.reset(len(self.agent_index.agents))
         # Do comingout on the day that randomly selected from the 1st, 2nd and 3rd day.
-        self.co_date = random.randint(1, 3)
+        self.co_date = self.rng.randint(1, 3)
         # Choose fake role randomly.
-        self.fake_role = random.choice([r for r in [Role.VILLAGER, Role.SEER, Role.MEDIUM]
-                                        if r in self.game_info.existing_role_list])
+        self.fake_role = self.rng.choice([r for r in [Role.VILLAGER, Role.SEER, Role.MEDIUM]
+                                          if r in self.game_info.existing_role_list])
 
     def get_fake_judge(self) -> Judge:
         # Determine the target of the fake judgement.
         target: Agent = AGENT_NONE
         if self.fake_role == Role.SEER:  # Fake seer chooses a target randomly.
             if self.game_info.day != 0:
-                target = self.random_select(self.get_alive(self.not_judged_agents))
+                target = self.random_select(self.select(self.not_judged & self.alive))
         elif self.fake_role == Role.MEDIUM:
             target = self.game_info.executed_agent if self.game_info.executed_agent is not None \
                 else AGENT_NONE
@@ -45,32 +54,54 @@ class HyunjiWerewolf(HyunjiPossessed):
         # If the target is a human
         # and the number of werewolves found is less than the total number of werewolves,
         # judge as a werewolf with a probability of 0.3.
-        result: Species = Species.WEREWOLF if target in self.humans \
-            and len(self.werewolves) < self.num_wolves and random.random() < 0.3 \
+        result: Species = Species.WEREWOLF if self.humans & bit(target) \
+            and count(self.werewolves) < self.num_wolves and self.rng.random() < 0.3 \
             else Species.HUMAN
         return Judge(self.me, self.game_info.day, target, result)
 
     def day_start(self) -> None:
         super().day_start()
         self.attack_vote_candidate = AGENT_NONE
+        self.declared = AGENT_NONE
+
+    def update(self, game_info: GameInfo) -> None:
+        super().update(game_info)
+        # Tally the whispers that have not been read yet.
+        if self.delta.new_day:
+            self.team.new_day()
+        for whisper in self.delta.whispers:
+            self.team.add(whisper)
+
+    def get_attack_candidates(self) -> int:
+        """Return the bitmask of candidates to be attacked."""
+        # Attack one of the alive humans, preferring the ones that did comingout.
+        return self.suspicion.best(self.ATTACK_WEIGHTS, self.humans & self.alive)
+
+    def get_attack_target(self) -> Agent:
+        """Return the target the team converges on if it is an alive human, or else my own candidate."""
+        targets: int = self.humans & self.alive
+        if targets & bit(self.team.leader):
+            return self.team.leader
+        # My own candidate is chosen once a day, and again only if it has died.
+        if self.attack_vote_candidate == AGENT_NONE or not targets & bit(self.attack_vote_candidate):
+            self.attack_vote_candidate = self.random_select(self.select(self.get_attack_candidates()))
+        return self.attack_vote_candidate
 
     def whisper(self) -> Content:
         # Declare the fake role on the 1st day,
         # and declare the target of attack vote after that.
         if self.game_info.day == 0:
-            return Content(ComingoutContentBuilder(self.me, self.fake_role))
-        # Choose the target of attack vote.
-        # Vote for one of the agent that did comingout.
-        candidates = [a for a in self.get_alive(self.humans) if a in self.comingout_map]
-        # Vote for one of the alive human agents if there are no candidates.
-        if not candidates:
-            candidates = self.get_alive(self.humans)
-        # Declare which to vote for if not declare yet or the candidate is changed.
-        if self.attack_vote_candidate == AGENT_NONE or self.attack_vote_candidate not in candidates:
-            self.attack_vote_candidate = self.random_select(candidates)
-            if self.attack_vote_candidate != AGENT_NONE:
-                return Content(AttackContentBuilder(self.attack_vote_candidate))
+            # One fake seer or medium in the team is enough.
+            if self.fake_role != Role.VILLAGER and self.team.claimed_by_ally(self.fake_role, self.me):
+                self.fake_role = Role.VILLAGER
+            return self.contents.comingout(self.me, self.fake_role)
+        # Declare the target if not declared yet or the target is changed.
+        target: Agent = self.get_attack_target()
+        if target != AGENT_NONE and target != self.declared:
+            self.declared = target
+            return self.contents.attack(target)
         return CONTENT_SKIP
 
     def attack(self) -> Agent:
-        return self.attack_vote_candidate if self.attack_vote_candidate != AGENT_NONE else self.me
\ No newline at end of file
+        target: Agent = self.get_attack_target()
+        return target if target != AGENT_NONE else self.me
@@ -0,0 +1,64 @@
+from typing import Dict, List, Optional
+
+from aiwolf import Agent, Content, Role, Topic, Whisper
+from aiwolf.constant import AGENT_NONE
+
+from content_cache import compile_content
+
+
+class WolfTeam:
+    """Attack votes and fake roles the werewolves declared in whispers, tallied as the whispers arrive.
+    The leading target is kept up to date with every declaration, so that it is read in constant time."""
+    __slots__ = ("attack_votes", "tally", "leader", "fake_roles")
+    attack_votes: Dict[Agent, Agent] # Latest attack target each werewolf declared today.
+    tally: List[int] # Number of werewolves declaring each agent as the target, by agent index.
+    leader: Agent # Target declared by the most werewolves, the earliest one among ties.
+    fake_roles: Dict[Agent, Role] # Fake role each werewolf declared.
+
+    def __init__(self) -> None:
+        self.attack_votes = {}
+        self.tally = []
+        self.leader = AGENT_NONE
+        self.fake_roles = {}
+
+    def reset(self, size: int) -> None:
+        """Forget the previous game, for a game with agent indices below the given size."""
+        self.fake_roles.clear()
+        self.tally = [0] * size
+        self.new_day()
+
+    def new_day(self) -> None:
+        """Forget the attack votes of the previous day."""
+        self.attack_votes.clear()
+        self.tally = [0] * len(self.tally)
+        self.leader = AGENT_NONE
+
+    def add(self, whisper: Whisper) -> None:
+        """Tally the declaration in the whisper, if any."""
+        content: Content = compile_content(whisper.text)
+        if content.topic == Topic.ATTACK:
+            self.vote(whisper.agent, content.target)
+        elif content.topic == Topic.COMINGOUT:
+            self.fake_roles[whisper.agent] = content.role
+
+    def vote(self, wolf: Agent, target: Agent) -> None:
+        """Move the attack vote of the werewolf to the target."""
+        if not 0 < target.agent_idx < len(self.tally):
+            return
+        previous: Optional[Agent] = self.attack_votes.get(wolf)
+        if previous == target:
+            return
+        self.attack_votes[wolf] = target
+        self.tally[target.agent_idx] += 1
+        if previous is not None:
+            self.tally[previous.agent_idx] -= 1
+        if self.leader == AGENT_NONE or self.tally[target.agent_idx] > self.tally[self.leader.agent_idx]:
+            self.leader = target
+        elif previous == self.leader:  # The leader lost a vote, so another target may have overtaken it.
+            best: int = max(range(len(self.tally)), key=self.tally.__getitem__)
+            if self.tally[best] > self.tally[self.leader.agent_idx]:
+                self.leader = next(a for a in self.attack_votes.values() if a.agent_idx == best)
+
+    def claimed_by_ally(self, role: Role, me: Agent) -> bool:
+        """Bool value of whether a werewolf other than me declared the fake role."""
+        return any(r == role and a != me for a, r in self.fake_roles.items())